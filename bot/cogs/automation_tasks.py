@@ -26,6 +26,25 @@ from utils.logging import logger
 # --- END NEW IMPORTS ---
 
 
+def days_any_user_available(weekly_availability):
+    """Return the weekdays (0=Monday, 6=Sunday) on which at least one user is available.
+
+    Args:
+    ----
+        weekly_availability (dict): Maps each user to a comma-separated string of available weekdays.
+
+    Returns:
+    -------
+        set[int]: The weekdays covered by any user.
+
+    """
+    available_days = set()
+    for available_days_str in weekly_availability.values():
+        if available_days_str:
+            available_days.update(int(d) for d in available_days_str.split(','))
+    return available_days
+
+
 class AvailabilityPollView(discord.ui.View):
     # ... This class is unchanged ...
     """A discord.ui.View for handling weekly availability polls."""
@@ -128,20 +147,21 @@ class AvailabilityPollView(discord.ui.View):
             await interaction.response.edit_message(view=self)
 
         elif custom_id == "submit_availability":
-            user_db_id = db_manager.add_user(
-                user_id, interaction.user.display_name)
+            selected_indices = self.selected_slots[user_id]
+            selected_options_str = ",".join(map(str, sorted(selected_indices)))
+
+            with db_manager.write_batch():
+                user_db_id = db_manager.add_user(
+                    user_id, interaction.user.display_name)
+                if user_db_id is not None:
+                    db_manager.record_poll_response(
+                        self.poll_id, user_db_id, selected_options_str)
             if user_db_id is None:
                 await interaction.response.send_message(
                     "Error: Could not find or create user in database.", ephemeral=True
                 )
                 return
 
-            selected_indices = self.selected_slots[user_id]
-            selected_options_str = ",".join(map(str, sorted(selected_indices)))
-
-            db_manager.record_poll_response(
-                self.poll_id, user_db_id, selected_options_str)
-
             if selected_indices:
                 selected_datetimes = [self.suggested_slots[i]
                                       for i in selected_indices]
@@ -175,6 +195,28 @@ class AutomationTasks(commands.Cog):
     def __init__(self, bot):
         """Initialize the AutomationTasks cog."""
         self.bot = bot
+        # Decoded custom availability patterns, keyed by guild ID, alongside the JSON they came from
+        self._pattern_cache = {}
+
+    def _get_custom_pattern(self, guild_id, custom_pattern_json):
+        """Return the decoded custom availability pattern, only re-parsing it when the JSON changes.
+
+        Args:
+        ----
+            guild_id (int): The ID of the guild the pattern belongs to.
+            custom_pattern_json (str): The pattern as stored in the guild's config.
+
+        Returns:
+        -------
+            dict: Maps weekday numbers (as strings) to the selected slot hours.
+
+        """
+        cached = self._pattern_cache.get(guild_id)
+        if cached and cached[0] == custom_pattern_json:
+            return cached[1]
+        custom_pattern = json.loads(custom_pattern_json)
+        self._pattern_cache[guild_id] = (custom_pattern_json, custom_pattern)
+        return custom_pattern
 
     # ... [The methods _generate_ics_file, start_game_suggestion_poll, and close_game_suggestion_poll_job are unchanged] ...
 
@@ -234,8 +276,14 @@ class AutomationTasks(commands.Cog):
             color=discord.Color.blue()
         )
 
-        for game in top_suggested_games:
-            cover_art_url = get_game_image(game.name, image_type="grid")
+        # Fetch the cover art for every suggestion at once rather than one request after another
+        cover_art_urls = await asyncio.gather(
+            *(get_game_image(game.igdb_id, image_type="grid") for game in top_suggested_games),
+            return_exceptions=True)
+        for game, cover_art_url in zip(top_suggested_games, cover_art_urls):
+            if isinstance(cover_art_url, Exception):
+                logger.error(f"Error fetching cover art for '{game.name}': {cover_art_url}")
+                cover_art_url = None
             value = f"Players: {game.min_players or '?'} - {game.max_players or '?'}\n"
             if cover_art_url:
                 value += f"[Cover Art]({cover_art_url})\n"
@@ -381,6 +429,8 @@ class AutomationTasks(commands.Cog):
                     max_items=200
                 )
 
+                # Links are collected here and written in one bulk insert once every title is resolved.
+                ownership_rows = []
                 for title in resp.titles:
                     game_title = title.name
                     if not game_title:
@@ -391,17 +441,18 @@ class AutomationTasks(commands.Cog):
                     game = db_manager.get_game_by_name(game_title)
                     if not game:
                         # Add the game to the central 'games' table if it doesn't exist
-                        game_id = await db_manager.add_game(title=game_title)
-                        if game_id:
-                            # Link the game to the user
-                            db_manager.add_user_game(user_db.id, game_id, source="xbox_achievement")
-                            logger.info(f"Added new Xbox game '{game_title}' to {user_db.username}'s library.")
-                    else:
+                        game = await db_manager.add_game(title=game_title)
+                        if game:
+                            # Queue the link to the user's library
+                            ownership_rows.append(
+                                {'user': user_db.id, 'game': game.igdb_id, 'source': 'XBOX_ACHIEVEMENT'})
+                    elif not db_manager.get_user_game_ownership(user_db.id, game.igdb_id):
                         # Game exists, just link it to the user if they don't have it already
-                        ownership = db_manager.get_user_game_ownership(user_db.id, game.id)
-                        if not ownership:
-                            db_manager.add_user_game(user_db.id, game.id, source="xbox_achievement")
-                            logger.info(f"Added existing Xbox game '{game_title}' to {user_db.username}'s library.")
+                        ownership_rows.append(
+                            {'user': user_db.id, 'game': game.igdb_id, 'source': 'XBOX_ACHIEVEMENT'})
+
+                new_links = db_manager.bulk_upsert_user_games(ownership_rows)
+                logger.info(f"Added {new_links} Xbox games to {user_db.username}'s library.")
 
             except Exception as e:
                 logger.error(f"Error syncing Xbox achievements for {user_db.username}: {e}", exc_info=True)
@@ -473,7 +524,7 @@ class AutomationTasks(commands.Cog):
         potential_slots = []
 
         if custom_pattern_json:
-            custom_pattern = json.loads(custom_pattern_json)
+            custom_pattern = self._get_custom_pattern(guild_id, custom_pattern_json)
             today = datetime.now()
             unique_potential_slots = set()
             for i in range(7):  # Iterate through the next 7 days
@@ -506,20 +557,9 @@ class AutomationTasks(commands.Cog):
                             day.replace(hour=hour, minute=0, second=0, microsecond=0))
             potential_slots = sorted(list(unique_potential_slots))
 
-        all_users_weekly_availability = db_manager.get_all_users_weekly_availability()
-        filtered_slots = []
-        for slot in potential_slots:
-            day_of_week_num = slot.weekday()
-            is_any_user_available = False
-            for _, available_days_str in all_users_weekly_availability.items():
-                if available_days_str:
-                    available_days_nums = [
-                        int(d) for d in available_days_str.split(',')]
-                    if day_of_week_num in available_days_nums:
-                        is_any_user_available = True
-                        break
-            if is_any_user_available:
-                filtered_slots.append(slot)
+        # Parse every user's availability once, then keep the slots on days someone can make
+        available_days = days_any_user_available(db_manager.get_all_users_weekly_availability())
+        filtered_slots = [slot for slot in potential_slots if slot.weekday() in available_days]
 
         if not filtered_slots:
             logger.info("No suitable game night slots found.")
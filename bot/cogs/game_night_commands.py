@@ -1,4 +1,5 @@
 # Standard library imports
+import asyncio
 import json
 import os
 from datetime import datetime, timedelta
@@ -239,11 +240,12 @@ class GameNightCommands(commands.Cog):
         """Set a user's attendance status for a specific game night."""
         await interaction.response.defer(ephemeral=True)
 
-        user_db_id = db_manager.add_user(str(interaction.user.id), interaction.user.display_name)
-        if user_db_id is None:
-            raise UserNotFoundError("There was an error finding you in the database.")
+        with db_manager.write_batch():
+            user_db_id = db_manager.add_user(str(interaction.user.id), interaction.user.display_name)
+            if user_db_id is None:
+                raise UserNotFoundError("There was an error finding you in the database.")
 
-        events.set_attendee_status(game_night_id, user_db_id, status)
+            events.set_attendee_status(game_night_id, user_db_id, status)
 
         # If the user is attending, schedule a reminder
         if status == "attending":
@@ -380,8 +382,14 @@ class GameNightCommands(commands.Cog):
             color=discord.Color.blue()
         )
 
-        for game in top_suggested_games:
-            cover_art_url = get_game_image(game.name, image_type="grid")
+        # Fetch the cover art for every suggestion at once rather than one request after another
+        cover_art_urls = await asyncio.gather(
+            *(get_game_image(game.igdb_id, image_type="grid") for game in top_suggested_games),
+            return_exceptions=True)
+        for game, cover_art_url in zip(top_suggested_games, cover_art_urls):
+            if isinstance(cover_art_url, Exception):
+                self.logger.error(f"Error fetching cover art for '{game.name}': {cover_art_url}")
+                cover_art_url = None
             value = f"Players: {game.min_players or '?'} - {game.max_players or '?'}\n"
             if cover_art_url:
                 value += f"[Cover Art]({cover_art_url})\n"
@@ -1,5 +1,6 @@
 import os
 import sys
+from collections import Counter
 from datetime import datetime, timedelta
 
 # Add the project root to the Python path before any other imports
@@ -9,6 +10,20 @@ from data import db_manager
 from data.models import GameExclusion, GameNight, UserAvailability, UserGame
 
 
+def _group_size_score(min_players, max_players, group_size):
+    """Score how well a game's player range fits the group size."""
+    if min_players is not None and max_players is not None:
+        if min_players <= group_size <= max_players:
+            return 10 # Good match
+        if min_players <= group_size + 2 and max_players >= group_size - 2: # A bit flexible
+            return 5
+    elif min_players is not None and group_size >= min_players:
+        return 3 # Only min players specified, but fits
+    elif max_players is not None and group_size <= max_players:
+        return 3 # Only max players specified, but fits
+    return 0
+
+
 def suggest_games(available_user_ids, group_size=None, preferred_tags=None):
     """Suggests games based on common ownership among available users, group size, and time since last played.
 
@@ -23,7 +38,8 @@ def suggest_games(available_user_ids, group_size=None, preferred_tags=None):
         list: A list of suggested game names, ordered by score.
 
     """
-    today_weekday = datetime.now().weekday() # Monday is 0 and Sunday is 6
+    now = datetime.now()
+    today_weekday = now.weekday() # Monday is 0 and Sunday is 6
 
     # Filter out users who are busy today
     truly_available_user_ids = []
@@ -47,37 +63,56 @@ def suggest_games(available_user_ids, group_size=None, preferred_tags=None):
 
     if not common_games_data:
         return []
-    # Filter out excluded games for each user
-    filtered_games = []
-    for game in common_games_data:
-        is_excluded_for_any_user = False
-        for user_id in available_user_ids:
-            if GameExclusion.get_or_none(user=user_id, game=game.igdb_id):
-                is_excluded_for_any_user = True
-                break
-        if not is_excluded_for_any_user:
-            filtered_games.append(game)
+    # Filter out games excluded by any user, looking up every exclusion in one query
+    common_game_ids = [game.igdb_id for game in common_games_data]
+    excluded_game_ids = {
+        game_id for (game_id,) in GameExclusion
+        .select(GameExclusion.game)
+        .where(GameExclusion.user.in_(available_user_ids) & GameExclusion.game.in_(common_game_ids))
+        .tuples()
+    }
+    filtered_games = [game for game in common_games_data if game.igdb_id not in excluded_game_ids]
     print(f"Filtered games: {filtered_games}")
 
+    # Load each user's ownership entries and the recent winners up front, rather than querying per game.
+    # The liked/disliked/installed flags are folded into one score adjustment per game as they are read.
+    preference_scores = Counter()
+    seen_user_games = set()
+    user_game_query = (UserGame
+                       .select(UserGame.user, UserGame.game, UserGame.liked, UserGame.disliked, UserGame.is_installed)
+                       .where(UserGame.user.in_(available_user_ids) &
+                              UserGame.game.in_([game.igdb_id for game in filtered_games]))
+                       .tuples())
+    for user_id, game_id, liked, disliked, is_installed in user_game_query:
+        # A user can own a game from several sources; only their first entry counts
+        if (user_id, game_id) in seen_user_games:
+            continue
+        seen_user_games.add((user_id, game_id))
+        if liked:
+            preference_scores[game_id] += 20 # Strong boost for liked games
+        elif disliked:
+            preference_scores[game_id] -= 20 # Strong penalty for disliked games
+        if is_installed:
+            preference_scores[game_id] += 15 # Significant boost for installed games
+    recent_wins = Counter(
+        game_id for (game_id,) in GameNight
+        .select(GameNight.selected_game)
+        .where((GameNight.scheduled_time > now - timedelta(days=30)) &
+               GameNight.selected_game.is_null(False))
+        .tuples()
+    )
+
     scored_games = []
     for game in filtered_games:
         score = 0
 
         # Score based on group size match
         if group_size is not None:
-            if game.min_players is not None and game.max_players is not None:
-                if game.min_players <= group_size <= game.max_players:
-                    score += 10 # Good match
-                elif game.min_players <= group_size + 2 and game.max_players >= group_size - 2: # A bit flexible
-                    score += 5
-            elif game.min_players is not None and group_size >= game.min_players:
-                score += 3 # Only min players specified, but fits
-            elif game.max_players is not None and group_size <= game.max_players:
-                score += 3 # Only max players specified, but fits
+            score += _group_size_score(game.min_players, game.max_players, group_size)
 
         # Score based on time since last played (prioritize older plays)
         if game.last_played:
-            time_diff = datetime.now() - game.last_played
+            time_diff = now - game.last_played
             # Penalize recently played games more heavily
             # Example: -10 points if played today, -5 if played within a week, etc.
             if time_diff.days < 1:
@@ -89,28 +124,14 @@ def suggest_games(available_user_ids, group_size=None, preferred_tags=None):
 
         # Score based on preferred tags
         if preferred_tags and game.tags:
-            game_tags = game.tags.split(',')
-            for tag in preferred_tags:
-                if tag in game_tags:
-                    score += 50
-
-        # Score based on liked/disliked status
-        for user_id in available_user_ids:
-            user_game_entry = UserGame.get_or_none(user=user_id, game=game.igdb_id)
-            if user_game_entry:
-                if user_game_entry.liked:
-                    score += 20 # Strong boost for liked games
-                elif user_game_entry.disliked:
-                    score -= 20 # Strong penalty for disliked games
-
-                if user_game_entry.is_installed:
-                    score += 15 # Significant boost for installed games
+            game_tags = set(game.tags.split(','))
+            score += 50 * sum(1 for tag in preferred_tags if tag in game_tags)
+
+        # Score based on liked/disliked/installed status
+        score += preference_scores[game.igdb_id]
 
         # Penalize games that have won recently
-        recent_game_nights = GameNight.select().where(GameNight.scheduled_time > datetime.now() - timedelta(days=30))
-        for gn in recent_game_nights:
-            if gn.selected_game and gn.selected_game.igdb_id == game.igdb_id:
-                score -= 50 # Heavy penalty for recently won games
+        score -= 50 * recent_wins[game.igdb_id] # Heavy penalty for each recent win
 
         scored_games.append((game, score))
 
@@ -14,6 +14,7 @@ from data import db_manager
 
 # from bot.game_pass_fetcher import fetch_game_pass_games  # Assuming this function exists
 from data.database import initialize_database
+from steam import http_client
 from utils.config import DISCORD_BOT_TOKEN
 from utils.logging import logger
 
@@ -64,6 +65,11 @@ class GameNightBot(commands.Bot):
             await self.web_client.aclose()
             logger.info("httpx ClientSession closed.")
 
+    async def close(self):
+        """Close the shared API client along with the bot."""
+        await http_client.aclose()
+        await super().close()
+
     async def on_ready(self):
         """Event that runs when the bot has successfully connected to Discord."""
         logger.info(f'Logged in as {self.user} (ID: {self.user.id})')
@@ -34,9 +34,11 @@ class AvailabilityPollView(discord.ui.View):
             await interaction.response.send_message("Error: Could not identify the game night for this poll.", ephemeral=True)
             return
 
-        user_db_id = db_manager.add_user(str(interaction.user.id), interaction.user.display_name)
+        with db_manager.write_batch():
+            user_db_id = db_manager.add_user(str(interaction.user.id), interaction.user.display_name)
+            if user_db_id:
+                db_manager.set_attendee_status(game_night_id, user_db_id, status)
         if user_db_id:
-            db_manager.set_attendee_status(game_night_id, user_db_id, status)
             await interaction.response.send_message(f"You've marked yourself as **{status.title()}**!", ephemeral=True)
         else:
             await interaction.response.send_message("Error: Could not register your availability.", ephemeral=True)
@@ -146,18 +148,10 @@ async def get_poll_results(message: discord.Message):
 
 async def get_game_poll_winner(game_night_id: int):
     """Determine the winner of a game selection poll based on database votes."""
-    votes = db_manager.get_game_votes(game_night_id)
-    if not votes:
-        return None
-
-    vote_counts = {}
-    for vote in votes:
-            game_details = await db_manager.get_game_details(vote.game_id)
-            if game_details:
-                vote_counts[game_details] = vote_counts.get(game_details, 0) + 1
-
+    vote_counts = db_manager.get_game_vote_counts(game_night_id)
     if not vote_counts:
         return None
 
-    winner = max(vote_counts, key=vote_counts.get)
-    return winner
+    # The most votes wins; ties go to the game with the lower ID.
+    winner_id = max(vote_counts, key=lambda game_id: (vote_counts[game_id], -game_id))
+    return db_manager.get_game_details(winner_id)
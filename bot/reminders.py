@@ -162,13 +162,14 @@ async def send_game_night_reminder(bot, user_discord_id, game_night_id, game_nam
         color=discord.Color.blue()
     )
 
-    # Add game art
-    cover_art_url = get_game_image(game_name, image_type="hero")
-    if cover_art_url:
-        embed.set_image(url=cover_art_url)
+    # Add game art; SteamGridDB looks games up by their IGDB ID, so the game has to be found first
+    game_db = db_manager.get_game_by_name(game_name)
+    if game_db:
+        cover_art_url = await get_game_image(game_db.igdb_id, image_type="hero")
+        if cover_art_url:
+            embed.set_image(url=cover_art_url)
 
     # Add launch button if it's a Steam game
-    game_db = db_manager.get_game_by_name(game_name)
     if game_db and game_db.steam_appid:
         launch_url = f"steam://run/{game_db.steam_appid}"
         view = discord.ui.View()
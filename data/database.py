@@ -1,36 +1,61 @@
 import importlib.util
 import os
 
-from data.models import db, initialize_models
+from data.models import DATABASE_PRAGMAS, TEST_DATABASE_PRAGMAS, AppliedMigration, db, initialize_models
 from utils.config import DATABASE_FILE
 from utils.logging import logger
 
+# A named in-memory database with a shared cache, so every connection in the process sees the same data.
+TEST_DATABASE_URI = "file:gamenight_test?mode=memory&cache=shared"
+
 
 def set_database_file(db_file):
     """Set the database file path for the global database object."""
-    db.init(db_file)
+    db.init(db_file, pragmas=DATABASE_PRAGMAS, uri=False)
+
+
+def set_test_database(db_uri=TEST_DATABASE_URI):
+    """Point the global database object at a throwaway test database, using the fast test PRAGMAs."""
+    db.init(db_uri, pragmas=TEST_DATABASE_PRAGMAS, uri=True)
 
-def apply_migrations():
-    """Apply database migrations sequentially."""
+def apply_migrations(record_only=False):
+    """Run the up() of every migration that has not been applied to this database yet, in order.
+
+    Args:
+    ----
+        record_only (bool): Record the pending migrations as applied without running them. Used for a database
+            whose schema was just created from the current models, which already include every migration.
+
+    """
     migrations_dir = os.path.join(os.path.dirname(__file__), '..', 'migrations')
     migration_files = sorted([f for f in os.listdir(migrations_dir) if f.endswith('.py') and f != '__init__.py'])
+    applied = {migration.name for migration in AppliedMigration.select(AppliedMigration.name)}
 
     for migration_file in migration_files:
-        try:
-            file_path = os.path.join(migrations_dir, migration_file)
-            spec = importlib.util.spec_from_file_location(migration_file, file_path)
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
+        if migration_file in applied:
+            continue
+        if not record_only:
+            try:
+                file_path = os.path.join(migrations_dir, migration_file)
+                spec = importlib.util.spec_from_file_location(migration_file, file_path)
+                module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)
+                if hasattr(module, 'up'):
+                    module.up()
+            except Exception as e:
+                # Later migrations may build on this one, so stop here and retry it on the next start
+                logger.error(f"Error applying migration {migration_file}: {e}")
+                return
             logger.info(f"Applied migration: {migration_file}")
-        except Exception as e:
-            logger.error(f"Error applying migration {migration_file}: {e}")
-            # Depending on your needs, you might want to re-raise the exception
-            # or handle it more gracefully (e.g., mark migration as failed).
+        AppliedMigration.create(name=migration_file)
 
 def initialize_database():
-    """Initialize the database by setting the file path and creating tables."""
+    """Initialize the database by setting the file path, creating tables and applying pending migrations."""
     set_database_file(DATABASE_FILE)
+    db.connect(reuse_if_open=True)
+    # A brand new database gets the current schema from the models, so its migrations only need recording
+    is_new_database = not db.get_tables()
     initialize_models()
-    
-    apply_migrations()
+
+    apply_migrations(record_only=is_new_database)
     logger.info("Database initialized using Peewee models.")
@@ -1,13 +1,17 @@
 # Standard library imports
 import json
 import re
+from collections import Counter, namedtuple
+from contextlib import contextmanager
+from copy import copy
 from datetime import datetime
+from functools import wraps
 
 # Third-party imports
-from peewee import fn
+from peewee import JOIN, chunked, fn
 
 # --- NEW IMPORTS ADDED HERE ---
-from steam.igdb_api import igdb_api
+from steam.igdb_api import extract_player_counts, igdb_api
 from utils.logging import logger
 
 # Local application imports
@@ -26,26 +30,85 @@ from .models import (
     db,
 )
 
+# Number of rows sent per INSERT statement by the bulk helpers.
+BULK_INSERT_BATCH_SIZE = 500
+
+# SQL for the hottest lookups, written once so each call skips building and rendering a query.
+_GET_GUILD_MAIN_CHANNEL_SQL = "SELECT main_channel_id FROM guildconfig WHERE guild_id = ? LIMIT 1"
+_GET_GUILD_CUSTOM_AVAILABILITY_SQL = "SELECT custom_availability_pattern FROM guildconfig WHERE guild_id = ? LIMIT 1"
+_GET_GUILD_VOICE_CHANNEL_SQL = "SELECT voice_notification_channel_id FROM guildconfig WHERE guild_id = ? LIMIT 1"
+_COUNT_POLL_RESPONSES_SQL = "SELECT COUNT(*) FROM pollresponse WHERE poll_id = ?"
+_GET_GAME_VOTE_GAME_IDS_SQL = "SELECT game_id FROM gamevote WHERE game_night_id = ?"
+_GET_POLL_RESPONSE_SQL = (
+    "SELECT selected_options, timestamp FROM pollresponse WHERE poll_id = ? AND user_id = ? LIMIT 1"
+)
+
+# Lightweight stand-in for a PollResponse row, returned by get_poll_response.
+PollResponseRow = namedtuple('PollResponseRow', 'selected_options timestamp')
+
+# Canonical IGDB IDs already resolved this session, keyed by lower-cased title.
+_canonical_igdb_id_cache: dict[str, int] = {}
+CANONICAL_IGDB_ID_CACHE_SIZE = 2048
+
 
+def db_op(default=None):
+    """Wrap a db_manager function with the module's standard error handling.
+
+    Any exception is logged and ``default`` is returned instead, so callers keep getting an empty
+    value rather than a traceback. A locked database is already waited on by SQLite's busy_timeout
+    (see DATABASE_PRAGMAS); sleeping and retrying here would block the event loop of the async
+    handlers that call these functions.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                logger.error(f"Error in {func.__name__}: {e}")
+                return copy(default)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def write_batch():
+    """Group several db_manager writes into a single transaction and commit.
+
+    Keep only synchronous database calls inside the block; awaiting inside it would hold
+    the write lock for other coroutines.
+    """
+    with db.atomic():
+        yield
+
+
+def _fetch_scalar(sql, params, default=None):
+    """Run a precompiled single-value query and return its first column, or default if no row matched."""
+    row = db.execute_sql(sql, params).fetchone()
+    return row[0] if row else default
+
+
+@db_op()
 def add_user(discord_id, username, steam_id=None, receive_voice_notifications=True):
     """Add a new user to the database or update an existing one."""
-    try:
-        with db.atomic():
-            user, created = User.get_or_create(
-                discord_id=discord_id,
-                defaults={'username': username, 'steam_id': steam_id, 'is_active': True, 'receive_voice_notifications': receive_voice_notifications}
-            )
-            if not created:
-                user.username = username
-                if steam_id is not None:
-                    user.steam_id = steam_id
-                user.is_active = True
-                user.receive_voice_notifications = receive_voice_notifications
-                user.save()
-            return user
-    except Exception as e:
-        logger.error(f"Error in add_user: {e}")
-        return None
+    with db.atomic():
+        user, created = User.get_or_create(
+            discord_id=discord_id,
+            defaults={
+                'username': username,
+                'steam_id': steam_id,
+                'is_active': True,
+                'receive_voice_notifications': receive_voice_notifications,
+            }
+        )
+        if not created:
+            user.username = username
+            if steam_id is not None:
+                user.steam_id = steam_id
+            user.is_active = True
+            user.receive_voice_notifications = receive_voice_notifications
+            user.save()
+        return user
 
 
 async def add_game(
@@ -73,9 +136,8 @@ async def add_game(
                         release_date = datetime.fromtimestamp(game_data["first_release_date"]).strftime('%Y-%m-%d')
                     if "multiplayer_modes" in game_data:
                         # Assuming the first multiplayer mode entry has min/max players
-                        if game_data["multiplayer_modes"] and len(game_data["multiplayer_modes"]) > 0:
-                            min_players = game_data["multiplayer_modes"][0].get("splitscreen_minimum") or game_data["multiplayer_modes"][0].get("offline_minimum") or game_data["multiplayer_modes"][0].get("online_minimum")
-                            max_players = game_data["multiplayer_modes"][0].get("splitscreen_maximum") or game_data["multiplayer_modes"][0].get("offline_maximum") or game_data["multiplayer_modes"][0].get("online_maximum")
+                        if game_data["multiplayer_modes"]:
+                            min_players, max_players = extract_player_counts(game_data["multiplayer_modes"])
 
             # In your models.py, igdb_id is the primary key for Game, so we prioritize it.
             if igdb_id:
@@ -132,9 +194,8 @@ async def add_game(
                         game.release_date = datetime.fromtimestamp(game_data["first_release_date"]).strftime('%Y-%m-%d')
                     if "multiplayer_modes" in game_data:
                         # Assuming the first multiplayer mode entry has min/max players
-                        if game_data["multiplayer_modes"] and len(game_data["multiplayer_modes"]) > 0:
-                            game.min_players = game_data["multiplayer_modes"][0].get("splitscreen_minimum") or game_data["multiplayer_modes"][0].get("offline_minimum") or game_data["multiplayer_modes"][0].get("online_minimum")
-                            game.max_players = game_data["multiplayer_modes"][0].get("splitscreen_maximum") or game_data["multiplayer_modes"][0].get("offline_maximum") or game_data["multiplayer_modes"][0].get("online_maximum")
+                        if game_data["multiplayer_modes"]:
+                            game.min_players, game.max_players = extract_player_counts(game_data["multiplayer_modes"])
                     # Add other fields as needed from IGDB data
 
             # Update fields only if they are provided
@@ -179,35 +240,64 @@ def add_user_game(user_id, game_id, source):
         logger.debug(f"Could not add UserGame link (might already exist): {e}")
 
 
+@db_op(default=0)
+def bulk_upsert_user_games(rows: list[dict]):
+    """Insert many UserGame links at once, skipping any that already exist.
+
+    Each row is a dict of UserGame fields, e.g. ``{'user': 1, 'game': 1234, 'source': 'STEAM'}``.
+    Returns the number of links that were newly created.
+    """
+    created_count = 0
+    with db.atomic():
+        for batch in chunked(rows, BULK_INSERT_BATCH_SIZE):
+            created_count += UserGame.insert_many(batch).on_conflict_ignore().as_rowcount().execute()
+    return created_count
+
+
+@db_op(default=[])
 def get_game_pass_catalog():
     """Retrieve the entire Game Pass catalog from the database."""
     logger.debug("Attempting to retrieve Game Pass catalog from database.")
-    try:
-        return list(GamePassGame.select(GamePassGame.microsoft_store_id, GamePassGame.title))
-    except Exception as e:
-        logger.error(f"Error getting game pass catalog: {e}")
-        return []
+    return list(GamePassGame.select(GamePassGame.microsoft_store_id, GamePassGame.title))
 
 
+@db_op()
 def add_game_pass_game(title, microsoft_store_id):
     """Add a new Game Pass game to the database or update its details if it already exists."""
-    try:
-        with db.atomic():
-            game, created = GamePassGame.get_or_create(
-                microsoft_store_id=microsoft_store_id,
-                defaults={'title': title}
-            )
-            if not created:
-                game.title = title
-                game.save()
-            return game.id
-    except Exception as e:
-        logger.error(f"Error in add_game_pass_game for '{title}': {e}")
-        return None
+    with db.atomic():
+        game, created = GamePassGame.get_or_create(
+            microsoft_store_id=microsoft_store_id,
+            defaults={'title': title}
+        )
+        if not created:
+            game.title = title
+            game.save()
+        return game.id
 
 async def _resolve_canonical_igdb_id(game_title: str) -> int | None:
     """
-    Resolves the most canonical IGDB ID for a given game title using fuzzy matching.
+    Resolves the most canonical IGDB ID for a given game title.
+    Titles resolved earlier in the session and games already stored under the exact title are
+    answered without searching IGDB; everything else falls back to fuzzy matching.
+    """
+    cache_key = game_title.strip().lower()
+    if cache_key in _canonical_igdb_id_cache:
+        return _canonical_igdb_id_cache[cache_key]
+
+    igdb_id = Game.select(Game.igdb_id).where((Game.title == game_title) & (Game.igdb_id > 0)).scalar()
+    if not igdb_id:
+        igdb_id = await _fuzzy_match_igdb_id(game_title)
+
+    # Only successful lookups are cached, so a failed search can be retried later
+    if igdb_id:
+        if len(_canonical_igdb_id_cache) >= CANONICAL_IGDB_ID_CACHE_SIZE:
+            _canonical_igdb_id_cache.pop(next(iter(_canonical_igdb_id_cache)))
+        _canonical_igdb_id_cache[cache_key] = igdb_id
+    return igdb_id
+
+async def _fuzzy_match_igdb_id(game_title: str) -> int | None:
+    """Find the best IGDB ID for a game title by fuzzy matching IGDB search results.
+
     Prioritizes exact matches and shorter, more general titles.
     """
     search_results = await igdb_api.search_games(game_title, limit=10)
@@ -303,7 +393,7 @@ async def sync_user_game_pass_library(user_id: int, has_game_pass: bool):
         return
 
     # 3. Add each game to the user's library.
-    games_added_count = 0
+    ownership_rows = []
     for igdb_id in game_pass_igdb_ids:
         # First, ensure the game exists in our main 'Game' table.
         game_obj = get_game_by_igdb_id(igdb_id)
@@ -325,112 +415,88 @@ async def sync_user_game_pass_library(user_id: int, has_game_pass: bool):
                 continue # Skip to next game if data can't be fetched
 
         if game_obj: # Ensure game_obj is not None after potential creation
-            # Now that we know the game is in the 'Game' table, link it to the user
+            # Now that we know the game is in the 'Game' table, queue a link to the user
             # with the 'game_pass' source.
-            # get_or_create is perfect here. It will only create the link if
-            # this user doesn't already have this game from the 'game_pass' source.
-            _, created = UserGame.get_or_create(
-                user=user_id,
-                game=game_obj.igdb_id,
-                source='game_pass'
-            )
-            if created:
-                games_added_count += 1
+            ownership_rows.append({'user': user_id, 'game': game_obj.igdb_id, 'source': 'game_pass'})
 
+    # Links the user already has from the 'game_pass' source are skipped.
+    games_added_count = bulk_upsert_user_games(ownership_rows)
     logger.info(f"Added/verified {games_added_count} new Game Pass games to user ID {user_id}'s library.")
 
 
+@db_op(default=[])
 def get_users_with_gamepass():
     """Retrieve all users who have the has_game_pass flag set to True."""
-    try:
-        return list(User.select().where(User.has_game_pass == True))
-    except Exception as e:
-        logger.error(f"Error in get_users_with_gamepass: {e}")
-        return []
+    return list(User.select().where(User.has_game_pass == True))
 
 
+@db_op()
 def remove_user_game(user_id, game_id, source=None):
     """Remove ownership records for a game from a user's library, optionally by source."""
-    try:
-        query = UserGame.delete().where((UserGame.user == user_id) & (UserGame.game == game_id))
-        if source:
-            query = query.where(UserGame.source == source)
-        query.execute()
-    except Exception as e:
-        logger.error(f"Error in remove_user_game: {e}")
+    query = UserGame.delete().where((UserGame.user == user_id) & (UserGame.game == game_id))
+    if source:
+        query = query.where(UserGame.source == source)
+    query.execute()
 
+@db_op()
 def remove_user_game_by_source(user_id: int, game_igdb_id: int, source: str):
     """Remove a specific game ownership record for a user based on game ID and source."""
-    try:
-        with db.atomic():
-            logger.debug(f"Attempting to remove game: user_id={user_id}, game_igdb_id={game_igdb_id}, source={source}")
-            normalized_source = source.lower()
-            logger.info(f"Attempting to remove game {game_igdb_id} for user {user_id} with normalized source {normalized_source}.")
-            # Find the specific UserGame entry
-            user_game_entry = UserGame.get_or_none(
-                (UserGame.user == user_id) &
-                (UserGame.game == game_igdb_id) &
-                (UserGame.source == normalized_source)
-            )
-            if user_game_entry:
-                user_game_entry.delete_instance()
-                logger.info(f"Successfully removed game {game_igdb_id} for user {user_id} from source {source}.")
-                return True
-            else:
-                logger.warning(f"No matching game ownership found for user {user_id}, game {game_igdb_id}, source {normalized_source}. Check parameters.")
-                return False
-    except Exception as e:
-        logger.error(f"Error in remove_user_game_by_source for user {user_id}, game {game_igdb_id}, source {source}: {e}")
+    logger.debug(f"Attempting to remove game: user_id={user_id}, game_igdb_id={game_igdb_id}, source={source}")
+    normalized_source = source.lower()
+    logger.info(
+        f"Attempting to remove game {game_igdb_id} for user {user_id} with normalized source {normalized_source}.")
+    # Delete the specific UserGame entry directly; the row count tells us whether it existed
+    deleted_count = UserGame.delete().where(
+        (UserGame.user == user_id) &
+        (UserGame.game == game_igdb_id) &
+        (UserGame.source == normalized_source)
+    ).execute()
+    if deleted_count:
+        logger.info(f"Successfully removed game {game_igdb_id} for user {user_id} from source {source}.")
+        return True
+    else:
+        logger.warning(
+            f"No matching game ownership found for user {user_id}, game {game_igdb_id}, "
+            f"source {normalized_source}. Check parameters."
+        )
+        return False
 
+@db_op()
 def set_user_game_installed(user_id, game_id, is_installed):
     """Set the installed status for all of a user's copies of a game."""
-    try:
-        query = (
-            UserGame.update(is_installed=is_installed)
-            .where((UserGame.user == user_id) & (UserGame.game == game_id))
-        )
-        query.execute()
-    except Exception as e:
-        logger.error(f"Error in set_user_game_installed: {e}")
+    query = (
+        UserGame.update(is_installed=is_installed)
+        .where((UserGame.user == user_id) & (UserGame.game == game_id))
+    )
+    query.execute()
 
 
+@db_op()
 def set_user_game_like_dislike_status(user_id, game_id, liked: bool, disliked: bool):
     """Set the liked and disliked status for a user's game, affecting all owned platforms."""
-    try:
-        query = (
-            UserGame.update(liked=liked, disliked=disliked)
-            .where((UserGame.user == user_id) & (UserGame.game == game_id))
-        )
-        query.execute()
-    except Exception as e:
-        logger.error(f"Error in set_user_game_like_dislike_status: {e}")
+    query = (
+        UserGame.update(liked=liked, disliked=disliked)
+        .where((UserGame.user == user_id) & (UserGame.game == game_id))
+    )
+    query.execute()
 
 
+@db_op()
 def get_user_by_discord_id(discord_id):
     """Retrieve a user by their Discord ID."""
-    try:
-        return User.get_or_none(User.discord_id == discord_id)
-    except Exception as e:
-        logger.error(f"Error in get_user_by_discord_id: {e}")
-        return None
+    return User.get_or_none(User.discord_id == discord_id)
 
 
+@db_op(default=[])
 def get_all_users():
     """Retrieve all active users from the database."""
-    try:
-        return list(User.select().where(User.is_active))
-    except Exception as e:
-        logger.error(f"Error in get_all_users: {e}")
-        return []
+    return list(User.select().where(User.is_active))
 
 
+@db_op(default=[])
 def get_users_with_xbox_tokens():
     """Retrieve all users who have an Xbox refresh token."""
-    try:
-        return list(User.select().where(User.xbox_refresh_token.is_null(False)))
-    except Exception as e:
-        logger.error(f"Error in get_users_with_xbox_tokens: {e}")
-        return []
+    return list(User.select().where(User.xbox_refresh_token.is_null(False)))
 
 
 def get_game_by_name(name):
@@ -441,13 +507,22 @@ def get_game_by_name(name):
         return None
 
 
+@db_op()
 def get_game_by_igdb_id(igdb_id):
     """Retrieve a game by its IGDB ID."""
-    try:
-        return Game.get_or_none(Game.igdb_id == igdb_id)
-    except Exception as e:
-        logger.error(f"Error in get_game_by_igdb_id: {e}")
-        return None
+    return Game.get_or_none(Game.igdb_id == igdb_id)
+
+
+@db_op()
+def get_game_sgdb_id(igdb_id):
+    """Retrieve the cached SteamGridDB ID for a game, if it has been looked up before."""
+    return Game.select(Game.sgdb_id).where(Game.igdb_id == igdb_id).scalar()
+
+
+@db_op()
+def set_game_sgdb_id(igdb_id, sgdb_id):
+    """Cache the SteamGridDB ID for a game."""
+    Game.update(sgdb_id=sgdb_id).where(Game.igdb_id == igdb_id).execute()
 
 
 def get_game_details(game_id):
@@ -470,150 +545,147 @@ def search_games_by_name(query):
         return []
 
 
+@db_op(default=[])
 def get_user_game_ownerships(user_id, gamepass_filter='include'):
     """Retrieve all games owned by a specific user."""
-    try:
-        query = UserGame.select().where(UserGame.user == user_id)
-        if gamepass_filter == 'only':
-            query = query.where(UserGame.source == 'game_pass')
-        elif gamepass_filter == 'exclude':
-            query = query.where(UserGame.source != 'game_pass')
-        user_games = list(query)
-        return user_games
-    except Exception as e:
-        logger.error(f"Error in get_user_game_ownerships: {e}")
-        return []
+    query = UserGame.select().where(UserGame.user == user_id)
+    if gamepass_filter == 'only':
+        query = query.where(UserGame.source == 'game_pass')
+    elif gamepass_filter == 'exclude':
+        query = query.where(UserGame.source != 'game_pass')
+    user_games = list(query)
+    return user_games
 
 
+@db_op()
 def set_steam_id(user_id, steam_id):
     """Set the Steam ID for a given user."""
-    try:
-        logger.info(f"Attempting to set Steam ID {steam_id} for user {user_id}.")
-        query = User.update(steam_id=steam_id).where(User.id == user_id)
-        rows_updated = query.execute()
-        if rows_updated > 0:
-            logger.info(f"Successfully set Steam ID {steam_id} for user {user_id}.")
-        else:
-            logger.warning(f"Could not set Steam ID {steam_id} for user {user_id}. User not found or no change.")
-    except Exception as e:
-        logger.error(f"Error in set_steam_id for user {user_id} with Steam ID {steam_id}: {e}")
+    logger.info(f"Attempting to set Steam ID {steam_id} for user {user_id}.")
+    query = User.update(steam_id=steam_id).where(User.id == user_id)
+    rows_updated = query.execute()
+    if rows_updated > 0:
+        logger.info(f"Successfully set Steam ID {steam_id} for user {user_id}.")
+    else:
+        logger.warning(f"Could not set Steam ID {steam_id} for user {user_id}. User not found or no change.")
 
 
+@db_op()
 def set_xbox_tokens(user_id, refresh_token, xuid):
     """Set the Xbox refresh token and XUID for a given user."""
-    try:
-        query = User.update(xbox_refresh_token=refresh_token, xbox_xuid=xuid).where(User.id == user_id)
-        query.execute()
-    except Exception as e:
-        logger.error(f"Error in set_xbox_tokens: {e}")
+    query = User.update(xbox_refresh_token=refresh_token, xbox_xuid=xuid).where(User.id == user_id)
+    query.execute()
 
 
+@db_op()
 def set_user_reminder_offset(user_id, offset_minutes):
     """Set the reminder offset for a given user."""
-    try:
-        query = User.update(default_reminder_offset_minutes=offset_minutes).where(User.id == user_id)
-        query.execute()
-    except Exception as e:
-        logger.error(f"Error in set_user_reminder_offset: {e}")
+    query = User.update(default_reminder_offset_minutes=offset_minutes).where(User.id == user_id)
+    query.execute()
 
 
+@db_op()
 def set_user_game_pass_status(user_id, has_game_pass: bool):
     """Set a user's Game Pass status."""
-    try:
-        query = User.update(has_game_pass=has_game_pass).where(User.id == user_id)
-        query.execute()
-    except Exception as e:
-        logger.error(f"Error in set_user_game_pass_status: {e}")
+    query = User.update(has_game_pass=has_game_pass).where(User.id == user_id)
+    query.execute()
 
 
-def get_common_games_for_users(user_ids: list[int], gamepass_filter='include'):
-    """Retrieve games common to all users in a list."""
+@db_op(default=[])
+def get_games_owned_by_users(user_ids: list[int]):
+    """Retrieve the games owned by every user in a list, from any source."""
     if not user_ids:
         return []
-    try:
-        # Step 1: Find the set of game IDs that are common to all users.
-        # This query identifies game_ids owned by the correct number of unique users.
-        common_games_query = (
-            UserGame.select(UserGame.game)
-            .where(UserGame.user.in_(user_ids))
-            .group_by(UserGame.game)
-            .having(fn.COUNT(UserGame.user.distinct()) == len(user_ids))
-        )
-        
-        common_game_ids = [ug.game.igdb_id for ug in common_games_query]
+    owned_by_all = (
+        UserGame.select(UserGame.game)
+        .where(UserGame.user.in_(user_ids))
+        .group_by(UserGame.game)
+        .having(fn.COUNT(UserGame.user.distinct()) == len(set(user_ids)))
+    )
+    return list(Game.select().where(Game.igdb_id.in_(owned_by_all)))
 
-        if not common_game_ids:
-            return []
 
-        # Step 2: Fetch all UserGame entries for these common games, but only for the specified users.
-        # This is crucial to get the correct source, liked, disliked, etc., information for each user.
-        final_query = UserGame.select(UserGame, Game).join(Game).where(
-            (UserGame.game.in_(common_game_ids)) &
-            (UserGame.user.in_(user_ids)) # This ensures we only get ownerships for the selected users
-        )
-
-        # Step 3: Apply the gamepass_filter to the results from Step 2.
-        # This is the corrected logic. We filter AFTER finding the common games.
-        if gamepass_filter == 'only':
-            # We need to check if ALL users in the list own the game via Game Pass.
-            # This is more complex than a simple where clause.
-            # We'll filter this in Python after fetching the data.
-            pass # See Python-side filtering below
-        elif gamepass_filter == 'exclude':
-            # Exclude games where ANY of the selected users own it via Game Pass.
-            # We find all common games where at least one user has it on game pass
-            game_pass_game_ids = (
-                final_query.where(UserGame.source == 'GAME_PASS')
-                .distinct(UserGame.game)
-                .select(UserGame.game)
-            )
-            # Then we exclude these games from our main query
-            final_query = final_query.where(UserGame.game.not_in(game_pass_game_ids))
-
-        all_user_games = list(final_query)
-
-        # Python-side filtering for the 'only' case
-        if gamepass_filter == 'only':
-            game_to_users = {}
-            for ug in all_user_games:
-                if ug.game.igdb_id not in game_to_users:
-                    game_to_users[ug.game.igdb_id] = set()
-                game_to_users[ug.game.igdb_id].add(ug.user.id)
-            
-            # Find games where the set of users who own it on Game Pass is the same as the full set of users
-            game_pass_only_ids = set()
-            for game_id, user_set in game_to_users.items():
-                # Check if all users in the original list own this game via game pass
-                is_owned_by_all_on_gp = True
-                for user_id in user_ids:
-                    # This check is complex, we need to query specifically for game pass ownership
-                    if not UserGame.select().where((UserGame.user == user_id) & (UserGame.game == game_id) & (UserGame.source == 'GAME_PASS')).exists():
-                        is_owned_by_all_on_gp = False
-                        break
-                if is_owned_by_all_on_gp:
-                    game_pass_only_ids.add(game_id)
-
-            # Filter the final list
-            all_user_games = [ug for ug in all_user_games if ug.game.igdb_id in game_pass_only_ids]
-
-        return all_user_games
-    except Exception as e:
-        logger.error(f"Error in get_common_games_for_users: {e}")
+@db_op(default=[])
+def get_common_games_for_users(user_ids: list[int], gamepass_filter='include'):
+    """Retrieve games common to all users in a list."""
+    if not user_ids:
+        return []
+    # Step 1: Find the set of game IDs that are common to all users.
+    # This query identifies game_ids owned by the correct number of unique users.
+    common_games_query = (
+        UserGame.select(UserGame.game)
+        .where(UserGame.user.in_(user_ids))
+        .group_by(UserGame.game)
+        .having(fn.COUNT(UserGame.user.distinct()) == len(user_ids))
+    )
+    
+    common_game_ids = [ug.game.igdb_id for ug in common_games_query]
+
+    if not common_game_ids:
         return []
 
-
+    # Step 2: Fetch all UserGame entries for these common games, but only for the specified users.
+    # This is crucial to get the correct source, liked, disliked, etc., information for each user.
+    final_query = UserGame.select(UserGame, Game).join(Game).where(
+        (UserGame.game.in_(common_game_ids)) &
+        (UserGame.user.in_(user_ids)) # This ensures we only get ownerships for the selected users
+    )
+
+    # Step 3: Apply the gamepass_filter to the results from Step 2.
+    # This is the corrected logic. We filter AFTER finding the common games.
+    if gamepass_filter == 'only':
+        # We need to check if ALL users in the list own the game via Game Pass.
+        # This is more complex than a simple where clause.
+        # We'll filter this in Python after fetching the data.
+        pass # See Python-side filtering below
+    elif gamepass_filter == 'exclude':
+        # Exclude games where ANY of the selected users own it via Game Pass.
+        # We find all common games where at least one user has it on game pass
+        game_pass_game_ids = (
+            final_query.where(UserGame.source == 'GAME_PASS')
+            .distinct(UserGame.game)
+            .select(UserGame.game)
+        )
+        # Then we exclude these games from our main query
+        final_query = final_query.where(UserGame.game.not_in(game_pass_game_ids))
+
+    all_user_games = list(final_query)
+
+    # Python-side filtering for the 'only' case
+    if gamepass_filter == 'only':
+        game_to_users = {}
+        for ug in all_user_games:
+            if ug.game.igdb_id not in game_to_users:
+                game_to_users[ug.game.igdb_id] = set()
+            game_to_users[ug.game.igdb_id].add(ug.user.id)
+        
+        # Find games where the set of users who own it on Game Pass is the same as the full set of users
+        game_pass_only_ids = set()
+        for game_id, user_set in game_to_users.items():
+            # Check if all users in the original list own this game via game pass
+            is_owned_by_all_on_gp = True
+            for user_id in user_ids:
+                # This check is complex, we need to query specifically for game pass ownership
+                if not UserGame.select().where((UserGame.user == user_id) & (UserGame.game == game_id) & (UserGame.source == 'GAME_PASS')).exists():
+                    is_owned_by_all_on_gp = False
+                    break
+            if is_owned_by_all_on_gp:
+                game_pass_only_ids.add(game_id)
+
+        # Filter the final list
+        all_user_games = [ug for ug in all_user_games if ug.game.igdb_id in game_pass_only_ids]
+
+    return all_user_games
+
+
+@db_op()
 def add_game_night_event(organizer_id, scheduled_time, channel_id):
     """Add a new game night event to the database."""
-    try:
-        game_night = GameNight.create(
-            organizer=organizer_id,
-            scheduled_time=scheduled_time,
-            channel_id=channel_id
-        )
-        return game_night.id
-    except Exception as e:
-        logger.error(f"Error in add_game_night_event: {e}")
-        return None
+    game_night = GameNight.create(
+        organizer=organizer_id,
+        scheduled_time=scheduled_time,
+        channel_id=channel_id
+    )
+    return game_night.id
 
 
 def add_suggested_game_to_game_night(game_night_id, game_name):
@@ -646,144 +718,111 @@ def get_suggested_games_for_game_night(game_night_id):
         return []
 
 
+@db_op(default=[])
 def get_all_games():
     """Retrieve all games from the database."""
-    try:
-        return list(Game.select())
-    except Exception as e:
-        logger.error(f"Error getting all games: {e}")
-        return []
+    return list(Game.select())
 
 
+@db_op()
 def get_user_game_ownership(user_id, game_id):
     """Retrieve a single UserGame entry for a user and game."""
-    try:
-        return UserGame.get_or_none((UserGame.user == user_id) & (UserGame.game == game_id))
-    except Exception as e:
-        logger.error(f"Error getting user game ownership: {e}")
-        return None
+    return UserGame.get_or_none((UserGame.user == user_id) & (UserGame.game == game_id))
 
 
+@db_op()
 def set_user_weekly_availability(user_id, available_days: str):
     """Set a user's weekly availability."""
-    try:
-        availability, _ = UserAvailability.get_or_create(user=user_id)
-        availability.available_days = "" if available_days.lower() == "none" else available_days
-        availability.save()
-    except Exception as e:
-        logger.error(f"Error setting user weekly availability: {e}")
+    availability, _ = UserAvailability.get_or_create(user=user_id)
+    availability.available_days = "" if available_days.lower() == "none" else available_days
+    availability.save()
 
 
+@db_op(default='')
 def get_user_weekly_availability(user_id):
     """Retrieve a user's weekly availability."""
-    try:
-        availability = UserAvailability.get_or_none(user=user_id)
-        return availability.available_days if availability else ""
-    except Exception as e:
-        logger.error(f"Error getting user weekly availability: {e}")
-        return ""
+    row = (UserAvailability.select(UserAvailability.available_days)
+           .where(UserAvailability.user == user_id).tuples().first())
+    return row[0] if row else ""
 
 
+@db_op(default={})
 def get_all_users_weekly_availability():
     """Retrieve all users' weekly availability as a dict."""
-    try:
-        query = UserAvailability.select().join(User)
-        return {avail.user.discord_id: avail.available_days for avail in query}
-    except Exception as e:
-        logger.error(f"Error getting all users weekly availability: {e}")
-        return {}
+    query = UserAvailability.select().join(User)
+    return {avail.user.discord_id: avail.available_days for avail in query}
 
 
+@db_op(default=[])
 def get_game_owners_with_platforms(game_id):
     """
     Retrieve all users who own a specific game, including their username.
 
     This also includes the source they own it on.
     """
-    try:
-        query = (
-            UserGame.select(User.discord_id, User.username, UserGame.source)
-            .join(User)
-            .where(UserGame.game == game_id)
-        )
-        return [(ug.user.discord_id, ug.user.username, ug.source) for ug in query]
-    except Exception as e:
-        logger.error(f"Error getting game owners with platforms: {e}")
-        return []
+    query = (
+        UserGame.select(User.discord_id, User.username, UserGame.source)
+        .join(User)
+        .where(UserGame.game == game_id)
+    )
+    return [(ug.user.discord_id, ug.user.username, ug.source) for ug in query]
 
 
+@db_op(default=0)
 def get_attended_game_nights_count(user_id, start_date, end_date):
     """Get the count of game nights a user attended within a given date range."""
-    try:
-        count = GameNightAttendee.select().join(GameNight).where(
-            (GameNightAttendee.user == user_id) &
-            (GameNightAttendee.status == 'attending') &
-            (GameNight.scheduled_time >= start_date) &
-            (GameNight.scheduled_time < end_date)
-        ).count()
-        return count
-    except Exception as e:
-        logger.error(f"Error getting attended game nights count: {e}")
-        return 0
-
+    count = GameNightAttendee.select().join(GameNight).where(
+        (GameNightAttendee.user == user_id) &
+        (GameNightAttendee.status == 'attending') &
+        (GameNight.scheduled_time >= start_date) &
+        (GameNight.scheduled_time < end_date)
+    ).count()
+    return count
+
+@db_op(default=False)
 def set_attendee_status(game_night_id, user_id, status):
     """Set or update a user's attendance status for a specific game night."""
-    try:
-        with db.atomic():
-            attendee, created = GameNightAttendee.get_or_create(
-                game_night=game_night_id,
-                user=user_id,
-                defaults={'status': status}
-            )
-            if not created:
-                attendee.status = status
-                attendee.save()
-            return True
-    except Exception as e:
-        logger.error(f"Error setting attendee status for game_night_id {game_night_id}, user_id {user_id}: {e}")
-        return False
+    with db.atomic():
+        attendee, created = GameNightAttendee.get_or_create(
+            game_night=game_night_id,
+            user=user_id,
+            defaults={'status': status}
+        )
+        if not created:
+            attendee.status = status
+            attendee.save()
+        return True
 
 
+@db_op()
 def create_poll(
     poll_message_id, channel_id, poll_type, start_time, end_time,
     suggested_slots_json, expected_participants_json, related_game_night_id=None
 ):
     """Create a new poll entry in the database."""
-    try:
-        poll = Poll.create(
-            message_id=poll_message_id, channel_id=channel_id, poll_type=poll_type,
-            start_time=start_time, end_time=end_time,
-            suggested_slots_json=suggested_slots_json,
-            expected_participants_json=expected_participants_json,
-            related_game_night=related_game_night_id
-        )
-        return poll.id
-    except Exception as e:
-        logger.error(f"Error creating poll: {e}")
-        return None
+    poll = Poll.create(
+        message_id=poll_message_id, channel_id=channel_id, poll_type=poll_type,
+        start_time=start_time, end_time=end_time,
+        suggested_slots_json=suggested_slots_json,
+        expected_participants_json=expected_participants_json,
+        related_game_night=related_game_night_id
+    )
+    return poll.id
 
 
+@db_op(default=0)
 def get_poll_response_count(poll_id):
     """Get the number of responses for a given poll."""
-    try:
-        return PollResponse.select().where(PollResponse.poll == poll_id).count()
-    except Exception as e:
-        logger.error(f"Error getting poll response count: {e}")
-        return 0
+    return _fetch_scalar(_COUNT_POLL_RESPONSES_SQL, (poll_id,), 0)
 
 
+@db_op()
 def get_expected_participant_count(poll_id):
     """Get the number of expected participants for a given poll."""
-    try:
-        poll = Poll.get_by_id(poll_id)
-        if poll and poll.expected_participants_json:
-            return len(json.loads(poll.expected_participants_json))
-        return None
-    except Poll.DoesNotExist:
-        return None
-    except Exception as e:
-        logger.error(f"Error getting expected participant count: {e}")
-        return None
+    row = Poll.select(Poll.expected_participants_json).where(Poll.id == poll_id).tuples().first()
+    if row and row[0]:
+        return len(json.loads(row[0]))
+    return None
 
 
 def get_poll_by_id(poll_id):
@@ -794,157 +833,151 @@ def get_poll_by_id(poll_id):
         return None
 
 
+@db_op()
 def record_poll_response(poll_id, user_id, selected_options):
     """Record a user's response to a poll."""
-    try:
-        response, _ = PollResponse.get_or_create(poll=poll_id, user=user_id)
-        response.selected_options = selected_options
-        response.save()
-    except Exception as e:
-        logger.error(f"Error recording poll response: {e}")
+    # Upsert so the timestamp column is never written from Python; SQLite fills it on insert.
+    (PollResponse
+     .insert(poll=poll_id, user=user_id, selected_options=selected_options)
+     .on_conflict(
+         conflict_target=[PollResponse.poll, PollResponse.user],
+         update={PollResponse.selected_options: selected_options})
+     .execute())
 
 
+@db_op(default=[])
 def get_poll_responses(poll_id):
     """Retrieve all responses for a given poll."""
-    try:
-        return list(PollResponse.select().where(PollResponse.poll == poll_id))
-    except Exception as e:
-        logger.error(f"Error getting poll responses: {e}")
-        return []
+    return list(PollResponse.select().where(PollResponse.poll == poll_id))
 
 
+@db_op()
 def get_poll_response(poll_id, user_id):
-    """Retrieve a specific user's response for a given poll."""
-    try:
-        return PollResponse.get_or_none(poll=poll_id, user=user_id)
-    except Exception as e:
-        logger.error(f"Error getting specific poll response: {e}")
+    """Retrieve a specific user's response for a given poll as a PollResponseRow."""
+    row = db.execute_sql(_GET_POLL_RESPONSE_SQL, (poll_id, user_id)).fetchone()
+    if not row:
         return None
+    # The raw query skips the model's conversion, so parse the timestamp like a PollResponse row would
+    selected_options, timestamp = row
+    return PollResponseRow(selected_options, PollResponse.timestamp.python_value(timestamp))
 
 
+@db_op(default=[])
 def get_game_votes(game_night_id):
     """Retrieve all game votes for a given game night."""
-    try:
-        return list(GameVote.select().where(GameVote.game_night == game_night_id))
-    except Exception as e:
-        logger.error(f"Error getting game votes: {e}")
-        return []
+    return list(GameVote.select().where(GameVote.game_night == game_night_id))
+
+
+@db_op(default=Counter())
+def get_game_vote_counts(game_night_id):
+    """Count the votes each game received for a given game night, keyed by game ID.
+
+    Reads plain tuples instead of GameVote models; use get_game_votes when the vote rows are needed.
+    """
+    return Counter(row[0] for row in db.execute_sql(_GET_GAME_VOTE_GAME_IDS_SQL, (game_night_id,)))
 
 
+@db_op()
 def update_poll_status(poll_id, status):
     """Update the status of a poll."""
-    try:
-        query = Poll.update(status=status).where(Poll.id == poll_id)
-        query.execute()
-    except Exception as e:
-        logger.error(f"Error updating poll status: {e}")
+    query = Poll.update(status=status).where(Poll.id == poll_id)
+    query.execute()
 
 
+@db_op()
 def update_game_night_selected_game(game_night_id, game_id):
     """Update the selected game for a game night."""
-    try:
-        query = GameNight.update(selected_game=game_id).where(GameNight.id == game_night_id)
-        query.execute()
-    except Exception as e:
-        logger.error(f"Error updating game night selected game: {e}")
+    query = GameNight.update(selected_game=game_id).where(GameNight.id == game_night_id)
+    query.execute()
+
+
+def _upsert_guild_config(guild_id, field, value):
+    """Set one GuildConfig column, creating the guild's row if needed, in a single statement."""
+    (GuildConfig
+     .insert({GuildConfig.guild_id: guild_id, field: value})
+     .on_conflict(conflict_target=[GuildConfig.guild_id], update={field: value})
+     .execute())
 
 
+@db_op()
 def set_guild_main_channel(guild_id, channel_id):
     """Set the main channel ID for a given guild."""
-    try:
-        config, _ = GuildConfig.get_or_create(guild_id=guild_id)
-        config.main_channel_id = channel_id
-        config.save()
-    except Exception as e:
-        logger.error(f"Error setting guild main channel: {e}")
+    _upsert_guild_config(guild_id, GuildConfig.main_channel_id, channel_id)
 
 
+@db_op()
 def get_guild_main_channel(guild_id):
     """Retrieve the main channel ID for a given guild."""
-    try:
-        config = GuildConfig.get_or_none(guild_id=guild_id)
-        return config.main_channel_id if config else None
-    except Exception as e:
-        logger.error(f"Error getting guild main channel: {e}")
-        return None
+    return _fetch_scalar(_GET_GUILD_MAIN_CHANNEL_SQL, (guild_id,))
+
 
+def get_game_nights_eager(where_clause=None):
+    """Build a GameNight query that loads the organizer and selected game in the same SELECT.
 
+    Reading ``.organizer`` or ``.selected_game`` on the results costs no extra query.
+    """
+    query = (
+        GameNight.select(GameNight, User, Game)
+        .join(User, on=(GameNight.organizer == User.id))
+        .switch(GameNight)
+        .join(Game, JOIN.LEFT_OUTER, on=(GameNight.selected_game == Game.igdb_id))
+        .switch(GameNight)
+    )
+    if where_clause is not None:
+        query = query.where(where_clause)
+    return query
+
+
+@db_op(default=[])
 def get_user_game_night_history(user_id):
     """Retrieve a user's game night attendance history."""
-    try:
-        return list(
-            GameNight.select()
-            .join(GameNightAttendee)
-            .where(
-                (GameNightAttendee.user == user_id) &
-                (GameNightAttendee.status == 'attending')
-            )
-            .order_by(GameNight.scheduled_time.desc())
+    return list(
+        get_game_nights_eager()
+        .join(GameNightAttendee)
+        .where(
+            (GameNightAttendee.user == user_id) &
+            (GameNightAttendee.status == 'attending')
         )
-    except Exception as e:
-        logger.error(f"Error getting user game night history: {e}")
-        return []
+        .order_by(GameNight.scheduled_time.desc())
+    )
 
 
+@db_op()
 def set_guild_custom_availability(guild_id, pattern_json):
     """Set the custom availability pattern for a given guild."""
-    try:
-        config, _ = GuildConfig.get_or_create(guild_id=guild_id)
-        config.custom_availability_pattern = pattern_json
-        config.save()
-    except Exception as e:
-        logger.error(f"Error setting guild custom availability: {e}")
+    _upsert_guild_config(guild_id, GuildConfig.custom_availability_pattern, pattern_json)
 
 
+@db_op()
 def get_guild_custom_availability(guild_id):
     """Retrieve the custom availability pattern for a given guild."""
-    try:
-        config = GuildConfig.get_or_none(guild_id=guild_id)
-        return config.custom_availability_pattern if config else None
-    except Exception as e:
-        logger.error(f"Error getting guild custom availability: {e}")
-        return None
+    return _fetch_scalar(_GET_GUILD_CUSTOM_AVAILABILITY_SQL, (guild_id,))
 
+@db_op()
 def set_user_voice_notifications(user_id, enabled: bool):
     """Set whether a user receives voice activity notifications."""
-    try:
-        query = User.update(receive_voice_notifications=enabled).where(User.id == user_id)
-        query.execute()
-    except Exception as e:
-        logger.error(f"Error setting user voice notifications: {e}")
+    query = User.update(receive_voice_notifications=enabled).where(User.id == user_id)
+    query.execute()
 
+@db_op(default=True)
 def get_user_voice_notifications(user_id):
     """Retrieve whether a user receives voice activity notifications."""
-    try:
-        user = User.get_or_none(User.id == user_id)
-        return user.receive_voice_notifications if user else True # Default to True if user not found
-    except Exception as e:
-        logger.error(f"Error getting user voice notifications: {e}")
-        return True
+    # Only read the flag; the rest of the User row includes the wide xbox_refresh_token column.
+    row = User.select(User.receive_voice_notifications).where(User.id == user_id).tuples().first()
+    return row[0] if row else True # Default to True if user not found
 
+@db_op()
 def set_guild_voice_notification_channel(guild_id, channel_id):
     """Set the voice activity notification channel for a given guild."""
-    try:
-        config, _ = GuildConfig.get_or_create(guild_id=guild_id)
-        config.voice_notification_channel_id = channel_id
-        config.save()
-    except Exception as e:
-        logger.error(f"Error setting guild voice notification channel: {e}")
+    _upsert_guild_config(guild_id, GuildConfig.voice_notification_channel_id, channel_id)
 
+@db_op()
 def get_guild_voice_notification_channel(guild_id):
     """Retrieve the voice activity notification channel for a given guild."""
-    try:
-        config = GuildConfig.get_or_none(guild_id=guild_id)
-        return config.voice_notification_channel_id if config else None
-    except Exception as e:
-        logger.error(f"Error getting guild voice notification channel: {e}")
-        return None
+    return _fetch_scalar(_GET_GUILD_VOICE_CHANNEL_SQL, (guild_id,))
 
 # --- THIS FUNCTION IS NEW ---
+@db_op()
 def get_guild_config(guild_id):
     """Retrieve the entire configuration for a given guild."""
-    try:
-        return GuildConfig.get_or_none(guild_id=guild_id)
-    except Exception as e:
-        logger.error(f"Error getting guild config for {guild_id}: {e}")
-        return None
+    return GuildConfig.get_or_none(guild_id=guild_id)
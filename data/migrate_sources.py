@@ -4,6 +4,8 @@ import sys
 # Add the project root to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from peewee import Case
+
 from data.models import db, UserGame
 from data.database import initialize_database
 from utils.logging import logger
@@ -14,26 +16,21 @@ def migrate_sources_to_uppercase():
     """
     initialize_database() # Ensure database connection and models are set up
     
+    # Map each legacy spelling to its standardized form. If there are other sources that
+    # need to follow a different standardization, they can be added here.
+    source_renames = (
+        ("Game_Pass", "Game Pass"),
+        ("Pc", "PC"),
+    )
+
     try:
         with db.atomic():
-            updated_count = 0
-            for user_game in UserGame.select():
-                old_source = user_game.source
-                new_source = old_source # Initialize new_source with old_source
-
-                if old_source == "Game_Pass":
-                    new_source = "Game Pass"
-                elif old_source == "Pc":
-                    new_source = "PC"
-                # If there are other sources that need to be uppercased,
-                # or follow a different standardization, that logic would go here.
-                # For now, only addressing the specific request.
-
-                if old_source != new_source:
-                    user_game.source = new_source
-                    user_game.save()
-                    updated_count += 1
-                    logger.info(f"Migrated source for UserGame ID {user_game.id}: '{old_source}' -> '{new_source}'")
+            # A single CASE UPDATE rewrites every matching row in one pass through the table.
+            updated_count = (
+                UserGame.update(source=Case(UserGame.source, source_renames, UserGame.source))
+                .where(UserGame.source.in_([old for old, _ in source_renames]))
+                .execute()
+            )
             logger.info(f"Migration complete. Updated {updated_count} UserGame source entries.")
     except Exception as e:
         logger.error(f"Error during source migration: {e}")
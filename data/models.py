@@ -1,7 +1,9 @@
 from datetime import datetime
 
 from peewee import (
+    SQL,
     AutoField,
+    BigIntegerField,
     BooleanField,
     CharField,
     CompositeKey,
@@ -15,7 +17,30 @@ from peewee import (
 
 from utils.config import DATABASE_FILE
 
-db = SqliteDatabase(DATABASE_FILE)
+# WAL lets readers and the writer proceed concurrently, and synchronous=normal is
+# crash-safe under WAL while avoiding an fsync on every commit.
+DATABASE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'cache_size': -64000,  # 64MB page cache
+    'temp_store': 'memory',
+    'mmap_size': 268435456,  # 256MB
+    'busy_timeout': 5000,
+}
+
+# Test databases are throwaway, so durability is traded away entirely for speed.
+TEST_DATABASE_PRAGMAS = {
+    'journal_mode': 'memory',
+    'synchronous': 'off',
+    'cache_size': -20000,  # 20MB page cache
+    'temp_store': 'memory',
+    'locking_mode': 'exclusive',
+}
+
+db = SqliteDatabase(DATABASE_FILE, pragmas=DATABASE_PRAGMAS)
+
+# The column default for PollResponse.timestamp, shared with the migration that adds it to existing databases
+POLL_RESPONSE_TIMESTAMP_DEFAULT = "DEFAULT (datetime('now', 'localtime'))"
 
 
 class BaseModel(Model):
@@ -31,7 +56,7 @@ class User(BaseModel):
     """Represents a Discord user in the database."""
 
     id = AutoField()
-    discord_id = CharField(unique=True)
+    discord_id = BigIntegerField(unique=True)
     steam_id = CharField(null=True)
     username = CharField(null=True)
     is_active = BooleanField(default=True)
@@ -55,7 +80,7 @@ class Game(BaseModel):
     """Represents a game in the database."""
 
     igdb_id = IntegerField(primary_key=True)
-    steam_appid = CharField(null=True)
+    steam_appid = IntegerField(null=True)
     title = CharField()
     cover_url = CharField(null=True)
     multiplayer_info = TextField(null=True)
@@ -66,6 +91,8 @@ class Game(BaseModel):
     release_date = CharField(null=True)
     description = CharField(null=True)
     metacritic = IntegerField(null=True)
+    sgdb_id = IntegerField(null=True)  # SteamGridDB's ID for the game, cached after the first image lookup
+    updated_at = DateTimeField(null=True)  # When the details were last refreshed from IGDB
 
 
 class UserGame(BaseModel):
@@ -90,9 +117,9 @@ class GameNight(BaseModel):
     id = AutoField()
     organizer = ForeignKeyField(User, backref='organized_game_nights')
     scheduled_time = DateTimeField()
-    channel_id = CharField()
-    availability_poll_message_id = CharField(null=True)
-    game_poll_message_id = CharField(null=True)
+    channel_id = BigIntegerField()
+    availability_poll_message_id = BigIntegerField(null=True)
+    game_poll_message_id = BigIntegerField(null=True)
     suggested_games_list = CharField(null=True)
     poll_close_time = DateTimeField(null=True)
     selected_game = ForeignKeyField(Game, null=True, backref='game_nights')
@@ -127,8 +154,8 @@ class VoiceActivity(BaseModel):
     """Records a user's voice channel join and leave events."""
 
     user = ForeignKeyField(User, backref='voice_activities')
-    guild_id = CharField()
-    channel_id = CharField()
+    guild_id = BigIntegerField()
+    channel_id = BigIntegerField()
     join_time = DateTimeField()
     leave_time = DateTimeField(null=True)
     duration_seconds = IntegerField(null=True)
@@ -161,14 +188,18 @@ class GameVote(BaseModel):
         """Meta configuration for the GameVote model."""
 
         primary_key = CompositeKey('game_night', 'user')
+        # Covers the per-night vote lookup, so tallies are read from the index alone.
+        indexes = (
+            (('game_night', 'game', 'user'), False),
+        )
 
 
 class Poll(BaseModel):
     """Represents a poll created by the bot."""
 
     id = AutoField()
-    message_id = CharField(unique=True)
-    channel_id = CharField()
+    message_id = BigIntegerField(unique=True)
+    channel_id = BigIntegerField()
     poll_type = CharField()  # e.g., 'availability', 'game_selection'
     start_time = DateTimeField()
     end_time = DateTimeField()
@@ -185,7 +216,8 @@ class PollResponse(BaseModel):
     poll = ForeignKeyField(Poll, backref='responses')
     user = ForeignKeyField(User, backref='poll_responses')
     selected_options = CharField(null=True)
-    timestamp = DateTimeField(default=datetime.now)
+    # Filled in by SQLite, in local time like the datetime.now() values written everywhere else
+    timestamp = DateTimeField(constraints=[SQL(POLL_RESPONSE_TIMESTAMP_DEFAULT)])
 
     class Meta:
         """Meta configuration for the PollResponse model."""
@@ -196,11 +228,18 @@ class PollResponse(BaseModel):
 class GuildConfig(BaseModel):
     """Stores guild-specific configurations."""
 
-    guild_id = CharField(unique=True)
-    main_channel_id = CharField(null=True)
-    planning_channel_id = CharField(null=True)
+    guild_id = BigIntegerField(unique=True)
+    main_channel_id = BigIntegerField(null=True)
+    planning_channel_id = BigIntegerField(null=True)
     custom_availability_pattern = TextField(null=True)
-    voice_notification_channel_id = CharField(null=True)
+    voice_notification_channel_id = BigIntegerField(null=True)
+
+
+class AppliedMigration(BaseModel):
+    """Records a migration from the migrations folder that has been run on this database."""
+
+    name = CharField(primary_key=True)  # The migration's file name
+    applied_at = DateTimeField(default=datetime.now)
 
 
 def initialize_models():
@@ -221,6 +260,7 @@ def initialize_models():
         PollResponse,
         GuildConfig,
         GamePassGame,
+        AppliedMigration,
     ])
 
 
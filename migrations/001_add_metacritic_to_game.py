@@ -1,11 +1,6 @@
-from peewee import IntegerField, SqliteDatabase
-from playhouse.migrate import SqliteMigrator
+def up():
+    """No-op: Game.metacritic is part of the model, so create_tables() already adds the column."""
 
-db = SqliteDatabase('data/users.db')
-migrator = SqliteMigrator(db)
 
-metacritic_field = IntegerField(null=True)
-
-# migrate(
-#     migrator.add_column('game', 'metacritic', metacritic_field),
-# )
+def down():
+    """No-op: there is nothing to undo."""
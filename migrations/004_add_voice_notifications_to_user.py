@@ -4,6 +4,9 @@ from playhouse.migrate import migrate, SqliteMigrator
 from data.database import db
 
 def up():
+    # Databases created after the field was added to the model already have the column
+    if 'receive_voice_notifications' in [column.name for column in db.get_columns('user')]:
+        return
     migrator = SqliteMigrator(db)
     migrate(
         migrator.add_column('user', 'receive_voice_notifications', BooleanField(default=True)),
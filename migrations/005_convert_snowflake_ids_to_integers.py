@@ -0,0 +1,44 @@
+from peewee import BigIntegerField, CharField, IntegerField
+from playhouse.migrate import SqliteMigrator, migrate
+
+from data.database import db
+
+# Discord snowflakes (and Steam app IDs) were stored as decimal strings. As INTEGER
+# columns they take at most 8 bytes per row and per index entry instead of ~20.
+SNOWFLAKE_COLUMNS = [
+    ('user', 'discord_id', BigIntegerField(unique=True)),
+    ('gamenight', 'channel_id', BigIntegerField()),
+    ('gamenight', 'availability_poll_message_id', BigIntegerField(null=True)),
+    ('gamenight', 'game_poll_message_id', BigIntegerField(null=True)),
+    ('voiceactivity', 'guild_id', BigIntegerField()),
+    ('voiceactivity', 'channel_id', BigIntegerField()),
+    ('poll', 'message_id', BigIntegerField(unique=True)),
+    ('poll', 'channel_id', BigIntegerField()),
+    ('guildconfig', 'guild_id', BigIntegerField(unique=True)),
+    ('guildconfig', 'main_channel_id', BigIntegerField(null=True)),
+    ('guildconfig', 'planning_channel_id', BigIntegerField(null=True)),
+    ('guildconfig', 'voice_notification_channel_id', BigIntegerField(null=True)),
+    ('game', 'steam_appid', IntegerField(null=True)),
+]
+
+
+def up():
+    """Store the Discord snowflake and Steam app ID columns as integers."""
+    # SQLite rebuilds the table for each change; values that look like integers are
+    # converted on the way into the new INTEGER-affinity column.
+    migrator = SqliteMigrator(db)
+    with db.atomic():
+        migrate(*[
+            migrator.alter_column_type(table, column, field)
+            for table, column, field in SNOWFLAKE_COLUMNS
+        ])
+
+
+def down():
+    """Store the converted columns as text again."""
+    migrator = SqliteMigrator(db)
+    with db.atomic():
+        migrate(*[
+            migrator.alter_column_type(table, column, CharField(null=field.null, unique=field.unique))
+            for table, column, field in SNOWFLAKE_COLUMNS
+        ])
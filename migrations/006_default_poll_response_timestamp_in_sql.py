@@ -0,0 +1,26 @@
+from peewee import SQL, DateTimeField
+from playhouse.migrate import SqliteMigrator, migrate
+
+from data.database import db
+from data.models import POLL_RESPONSE_TIMESTAMP_DEFAULT
+
+
+def up():
+    """Let SQLite fill in PollResponse.timestamp when a response is inserted."""
+    # SQLite cannot change a column default in place, so the migrator rebuilds the table.
+    migrator = SqliteMigrator(db)
+    with db.atomic():
+        migrate(
+            migrator.alter_column_type(
+                'pollresponse', 'timestamp', DateTimeField(constraints=[SQL(POLL_RESPONSE_TIMESTAMP_DEFAULT)])
+            ),
+        )
+
+
+def down():
+    """Drop the SQL default from PollResponse.timestamp."""
+    migrator = SqliteMigrator(db)
+    with db.atomic():
+        migrate(
+            migrator.alter_column_type('pollresponse', 'timestamp', DateTimeField()),
+        )
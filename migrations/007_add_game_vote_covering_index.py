@@ -0,0 +1,22 @@
+from playhouse.migrate import SqliteMigrator, migrate
+
+from data.database import db
+
+
+def up():
+    """Add the covering (game_night, game, user) index to GameVote."""
+    # initialize_models() creates the model's indexes on existing tables too, so it may already be there
+    if 'gamevote_game_night_id_game_id_user_id' in [index.name for index in db.get_indexes('gamevote')]:
+        return
+    migrator = SqliteMigrator(db)
+    migrate(
+        migrator.add_index('gamevote', ('game_night_id', 'game_id', 'user_id'), False),
+    )
+
+
+def down():
+    """Drop the GameVote covering index."""
+    migrator = SqliteMigrator(db)
+    migrate(
+        migrator.drop_index('gamevote', 'gamevote_game_night_id_game_id_user_id'),
+    )
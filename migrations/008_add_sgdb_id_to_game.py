@@ -0,0 +1,20 @@
+from peewee import IntegerField
+from playhouse.migrate import SqliteMigrator, migrate
+
+from data.database import db
+
+
+def up():
+    """Add the Game.sgdb_id column."""
+    migrator = SqliteMigrator(db)
+    migrate(
+        migrator.add_column('game', 'sgdb_id', IntegerField(null=True)),
+    )
+
+
+def down():
+    """Drop the Game.sgdb_id column."""
+    migrator = SqliteMigrator(db)
+    migrate(
+        migrator.drop_column('game', 'sgdb_id'),
+    )
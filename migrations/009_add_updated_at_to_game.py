@@ -0,0 +1,20 @@
+from peewee import DateTimeField
+from playhouse.migrate import SqliteMigrator, migrate
+
+from data.database import db
+
+
+def up():
+    """Add the Game.updated_at column."""
+    migrator = SqliteMigrator(db)
+    migrate(
+        migrator.add_column('game', 'updated_at', DateTimeField(null=True)),
+    )
+
+
+def down():
+    """Drop the Game.updated_at column."""
+    migrator = SqliteMigrator(db)
+    migrate(
+        migrator.drop_column('game', 'updated_at'),
+    )
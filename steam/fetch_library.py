@@ -28,17 +28,19 @@ async def fetch_and_store_games_for_all_users():
 
 async def fetch_and_store_games(user_id, steam_id):
     """Fetch games for a user and store them in the database."""
-    games = get_owned_games(steam_id)
+    games = await get_owned_games(steam_id)
     if not games:
         logger.warning(f"Could not retrieve games for user {user_id} (Steam ID: {steam_id}). No games returned from Steam API.")
         return
     logger.info(f"Retrieved {len(games)} games from Steam API for user {user_id} (Steam ID: {steam_id}).")
 
+    # Links are collected here and written in one bulk insert once every game is resolved.
+    ownership_rows = []
     for game_data in games:
         try:
             with db.atomic():
                 # Fetch detailed game info
-                details = get_game_details(game_data['appid'])
+                details = await get_game_details(game_data['appid'])
 
                 # Add or get the game in the global Game table
                 game_name = details.get('name', game_data['name']) if details else game_data['name']
@@ -47,16 +49,17 @@ async def fetch_and_store_games(user_id, steam_id):
                     steam_appid=str(game_data['appid'])
                 )
                 if game_id is None:
-                    logger.error(f"Failed to add or retrieve game {name} to the global game list.")
+                    logger.error(f"Failed to add or retrieve game {game_name} to the global game list.")
                     continue
 
-                # Link the game to the user's library
-                db_manager.add_user_game(user_id, game_id, 'steam')
-                logger.info(f"Stored game {game_name} (ID: {game_id}) for user {user_id}.")
+                # Queue the link to the user's library
+                ownership_rows.append({'user': user_id, 'game': game_id, 'source': 'STEAM'})
+                logger.info(f"Resolved game {game_name} (ID: {game_id}) for user {user_id}.")
         except Exception as e:
             logger.error(f"Error storing game {game_data.get('name', 'Unknown')} for user {user_id}: {e}")
 
-    logger.info(f"Successfully stored {len(games)} games for user {user_id}.")
+    new_links = db_manager.bulk_upsert_user_games(ownership_rows)
+    logger.info(f"Successfully stored {len(ownership_rows)} games for user {user_id} ({new_links} newly linked).")
 
 
 async def main():
@@ -0,0 +1,29 @@
+# steam/http_client.py
+
+import httpx
+
+# One pooled client shared by every external API module, so repeated calls reuse
+# open TCP/TLS connections instead of handshaking on each request.
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=300)
+
+# Connection failures (refused, reset, DNS) are retried by the transport; HTTP error
+# statuses are left to each API module to handle.
+CONNECT_RETRIES = 3
+
+_client: httpx.AsyncClient | None = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared AsyncClient, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(transport=httpx.AsyncHTTPTransport(limits=HTTP_LIMITS, retries=CONNECT_RETRIES))
+    return _client
+
+
+async def aclose():
+    """Close the shared AsyncClient and its pooled connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
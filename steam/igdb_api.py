@@ -1,10 +1,96 @@
 # steam/igdb_api.py
 
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+from functools import lru_cache
+
 import httpx  # Use httpx for async requests
+import orjson
 
-from utils.config import IGDB_CLIENT_ID, IGDB_CLIENT_SECRET
+from steam.http_client import get_client
+from utils.config import (
+    IGDB_CLIENT_ID,
+    IGDB_CLIENT_SECRET,
+    IGDB_RESPONSE_CACHE_DIR,
+    IGDB_RESPONSE_CACHE_TTL,
+    IGDB_TOKEN_CACHE_FILE,
+)
 from utils.logging import logger
 
+# Refresh the access token this many seconds before it actually expires.
+TOKEN_EXPIRY_MARGIN_SECONDS = 60
+
+# Transient IGDB failures are retried with exponential backoff and full jitter.
+MAX_RETRIES = 4
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+RETRY_BASE_DELAY_SECONDS = 0.5
+RETRY_MAX_DELAY_SECONDS = 30
+
+# IGDB's external_games categories for each store we import from.
+PLATFORM_CATEGORY_MAP = {
+    "microsoft store": 11,
+    "xbox": 11,
+    "steam": 1,
+}
+
+# IGDB API has a limit on query size, so IDs are looked up in batches of 200.
+IGDB_BATCH_SIZE = 200
+
+# The /games fields the database writers read back; everything else in the record is never stored.
+GAME_DETAIL_FIELDS = "name, cover.image_id, summary, aggregated_rating, first_release_date, multiplayer_modes.*"
+# Requesting uid as well lets each result be matched back to its store ID
+EXTERNAL_GAMES_QUERY = 'fields game.id, uid; where category = {category_id} & uid = ({uids}); limit 500;'
+
+# IGDB allows 4 requests per second per client.
+IGDB_REQUESTS_PER_SECOND = 4
+
+
+# Player count keys in an IGDB multiplayer mode, in order of preference.
+MIN_PLAYER_KEYS = ("splitscreen_minimum", "offline_minimum", "online_minimum")
+MAX_PLAYER_KEYS = ("splitscreen_maximum", "offline_maximum", "online_maximum")
+
+
+def _first_truthy(mapping, keys):
+    """Return the value of the first key in ``keys`` that is set and truthy in ``mapping``, or None."""
+    return next((mapping[key] for key in keys if mapping.get(key)), None)
+
+
+def extract_player_counts(multiplayer_modes):
+    """Return the (min, max) player counts from a game's first IGDB multiplayer mode.
+
+    Splitscreen counts are preferred, then offline, then online.
+    """
+    if not multiplayer_modes:
+        return None, None
+    mp_modes = multiplayer_modes[0]
+    return _first_truthy(mp_modes, MIN_PLAYER_KEYS), _first_truthy(mp_modes, MAX_PLAYER_KEYS)
+
+
+class RateLimiter:
+    """Space out request starts so that no more than `rate` begin in any `period` seconds."""
+
+    def __init__(self, rate: int, period: float = 1.0):
+        """Initialize the limiter with the allowed number of requests per period."""
+        self.interval = period / rate
+        self._next_slot = 0.0
+
+    async def __aenter__(self):
+        """Wait until this request's slot comes up."""
+        # Reserving the slot happens without awaiting, so it is atomic within the event loop.
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def __aexit__(self, *exc_info):
+        """Release nothing; slots are time-based."""
+        return False
+
 
 class IGDBAPI:
     """An ASYNCHRONOUS client for interacting with the IGDB API."""
@@ -16,12 +102,75 @@ class IGDBAPI:
         self.client_id = IGDB_CLIENT_ID
         self.client_secret = IGDB_CLIENT_SECRET
         self.access_token = None
+        self.token_expires_at = 0
+        self.headers = None
+        self.rate_limiter = RateLimiter(IGDB_REQUESTS_PER_SECOND)
+        # Lookups currently in flight, so concurrent callers asking for the same game share one request
+        self._inflight: dict[tuple[int, str], asyncio.Future] = {}
+        # Expired response cache entries are swept once per process, before the first new one is written
+        self._response_cache_pruned = False
+
+    def _token_is_valid(self, expires_at):
+        """Check whether a token expiring at ``expires_at`` can still be used."""
+        return expires_at - TOKEN_EXPIRY_MARGIN_SECONDS > time.time()
+
+    def _set_access_token(self, access_token, expires_at):
+        """Store the access token and build the request headers for it."""
+        self.access_token = access_token
+        self.token_expires_at = expires_at
+        self.headers = {
+            'Client-ID': self.client_id,
+            'Authorization': f'Bearer {self.access_token}',
+            'Accept': 'application/json',
+        }
+
+    def _load_cached_token(self):
+        """Load a still-valid access token from the on-disk cache, if there is one."""
+        try:
+            with open(IGDB_TOKEN_CACHE_FILE) as f:
+                cached = json.load(f)
+            if cached.get('client_id') == self.client_id and self._token_is_valid(cached['expires_at']):
+                self._set_access_token(cached['access_token'], cached['expires_at'])
+                return True
+        except (OSError, ValueError, KeyError):
+            pass
+        return False
+
+    def _save_cached_token(self):
+        """Write the current access token to the on-disk cache."""
+        try:
+            os.makedirs(os.path.dirname(IGDB_TOKEN_CACHE_FILE), exist_ok=True)
+            temp_file = f"{IGDB_TOKEN_CACHE_FILE}.tmp"
+            with open(temp_file, 'w') as f:
+                json.dump({
+                    'client_id': self.client_id,
+                    'access_token': self.access_token,
+                    'expires_at': self.token_expires_at,
+                }, f)
+            # Replace in one step so a concurrent reader never sees a half-written file
+            os.replace(temp_file, IGDB_TOKEN_CACHE_FILE)
+        except OSError as e:
+            logger.warning(f"Could not cache IGDB access token: {e}")
+
+    def _clear_access_token(self):
+        """Forget the current access token, in memory and on disk, so the next request fetches a new one."""
+        self.access_token = None
+        self.token_expires_at = 0
         self.headers = None
+        try:
+            os.remove(IGDB_TOKEN_CACHE_FILE)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove cached IGDB access token: {e}")
 
     async def _get_access_token(self):
-        """Fetch a new access token from the Twitch API."""
+        """Return a valid access token, reusing the cached one until it expires."""
         # This check prevents re-fetching the token on every single request
-        if self.access_token:
+        if self.access_token and self._token_is_valid(self.token_expires_at):
+            return self.access_token
+        # Tokens last for weeks, so one from a previous run is usually still good
+        if self._load_cached_token():
             return self.access_token
 
         params = {
@@ -29,102 +178,210 @@ class IGDBAPI:
             'client_secret': self.client_secret,
             'grant_type': 'client_credentials'
         }
-        async with httpx.AsyncClient() as client:
+        try:
+            response = await get_client().post(self.auth_url, params=params)
+            response.raise_for_status()
+            token_data = orjson.loads(response.content)
+            self._set_access_token(token_data['access_token'], time.time() + token_data['expires_in'])
+            self._save_cached_token()
+            logger.info("Successfully obtained new IGDB access token.")
+            return self.access_token
+        except httpx.RequestError as e:
+            logger.error(f"Error getting IGDB access token: {e}")
+            return None
+
+    @staticmethod
+    def _retry_delay(response, attempt):
+        """Return how long to wait before retrying, honouring IGDB's Retry-After header when present."""
+        try:
+            return min(float(response.headers["Retry-After"]), RETRY_MAX_DELAY_SECONDS)
+        except (KeyError, ValueError):
+            return random.uniform(0, min(RETRY_MAX_DELAY_SECONDS, RETRY_BASE_DELAY_SECONDS * 2 ** attempt))
+
+    @staticmethod
+    def _response_cache_path(endpoint, data):
+        """Return the cache file path for a request to ``endpoint`` with query ``data``."""
+        key = hashlib.sha256(f"{endpoint}\n{data}".encode()).hexdigest()
+        return os.path.join(IGDB_RESPONSE_CACHE_DIR, f"{key}.json")
+
+    @staticmethod
+    def _response_cache_is_fresh(cache_path):
+        """Check whether a cache entry is younger than the cache TTL."""
+        return time.time() - os.path.getmtime(cache_path) < IGDB_RESPONSE_CACHE_TTL
+
+    def _read_cached_response(self, cache_path):
+        """Return the cached response body if it is younger than the cache TTL, else None.
+
+        An expired entry is deleted, so the next response takes its place.
+        """
+        try:
+            if self._response_cache_is_fresh(cache_path):
+                with open(cache_path, 'rb') as f:
+                    return orjson.loads(f.read())
+            os.remove(cache_path)
+        except (OSError, ValueError):
+            pass
+        return None
+
+    def _prune_response_cache(self):
+        """Delete every expired entry from the on-disk response cache."""
+        try:
+            entries = os.listdir(IGDB_RESPONSE_CACHE_DIR)
+        except OSError:
+            return
+        for entry in entries:
+            cache_path = os.path.join(IGDB_RESPONSE_CACHE_DIR, entry)
             try:
-                response = await client.post(self.auth_url, params=params)
-                response.raise_for_status()
-                token_data = response.json()
-                self.access_token = token_data['access_token']
-
-                # Set up the headers once we have the token
-                self.headers = {
-                    'Client-ID': self.client_id,
-                    'Authorization': f'Bearer {self.access_token}',
-                    'Accept': 'application/json',
-                }
-                logger.info("Successfully obtained new IGDB access token.")
-                return self.access_token
-            except httpx.RequestError as e:
-                logger.error(f"Error getting IGDB access token: {e}")
-                return None
+                if not self._response_cache_is_fresh(cache_path):
+                    os.remove(cache_path)
+            except OSError:
+                pass
+
+    def _write_cached_response(self, cache_path, content):
+        """Store a response body in the on-disk cache."""
+        if not self._response_cache_pruned:
+            self._response_cache_pruned = True
+            self._prune_response_cache()
+        try:
+            os.makedirs(IGDB_RESPONSE_CACHE_DIR, exist_ok=True)
+            temp_file = f"{cache_path}.tmp"
+            with open(temp_file, 'wb') as f:
+                f.write(content)
+            os.replace(temp_file, cache_path)
+        except OSError as e:
+            logger.warning(f"Could not cache IGDB response: {e}")
+
+    async def _make_request(self, endpoint, data, cache=False):
+        """Make a POST request to a specified IGDB API endpoint.
+
+        IGDB only takes queries as POSTs, which HTTP caches won't store, so with ``cache`` set, successful
+        responses are cached on disk by endpoint and query for IGDB_RESPONSE_CACHE_TTL seconds. Only the ID
+        lookups the update script repeats use it; free-text searches would fill the cache with one-off entries.
+        """
+        cache_path = self._response_cache_path(endpoint, data) if cache else None
+        if cache_path:
+            cached = self._read_cached_response(cache_path)
+            if cached is not None:
+                return cached
 
-    async def _make_request(self, endpoint, data):
-        """Make a POST request to a specified IGDB API endpoint."""
-        # Ensure we have a token and headers before making a request
-        if not self.headers:
+        # Ensure we have an unexpired token and headers before making a request
+        if not self.headers or not self._token_is_valid(self.token_expires_at):
             await self._get_access_token()
             if not self.headers:
                 logger.error("IGDB access token not available. Cannot make request.")
                 return None
 
         url = f"{self.base_url}/{endpoint}"
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(url, headers=self.headers, data=data)
-                response.raise_for_status()
-                return response.json()
-            except httpx.HTTPStatusError as e:
-                # Log the specific error from IGDB
-                logger.error(f"Error making IGDB request to {endpoint} (Query: {data}): {e}")
-                logger.error(f"Response body: {e.response.text}")
-                return None
-            except Exception as e:
-                logger.error(f"An unexpected error occurred during IGDB request: {e}")
-                return None
+        token_refreshed = False
+        try:
+            for attempt in range(MAX_RETRIES + 1):
+                async with self.rate_limiter:
+                    response = await get_client().post(url, headers=self.headers, data=data)
+                if response.status_code == 401 and not token_refreshed:
+                    # The token was revoked or rotated before it expired; replace it and retry once
+                    logger.warning(f"IGDB rejected the access token for {endpoint}. Requesting a new one.")
+                    token_refreshed = True
+                    self._clear_access_token()
+                    if not await self._get_access_token():
+                        break
+                    continue
+                if response.status_code not in RETRY_STATUS_CODES or attempt == MAX_RETRIES:
+                    break
+                delay = self._retry_delay(response, attempt)
+                logger.warning(f"IGDB request to {endpoint} returned {response.status_code}. "
+                               f"Retrying in {delay:.2f}s (attempt {attempt + 1} of {MAX_RETRIES}).")
+                await asyncio.sleep(delay)
+            response.raise_for_status()
+            result = orjson.loads(response.content)
+            if cache_path:
+                self._write_cached_response(cache_path, response.content)
+            return result
+        except httpx.HTTPStatusError as e:
+            # Log the specific error from IGDB
+            logger.error(f"Error making IGDB request to {endpoint} (Query: {data}): {e}")
+            logger.error(f"Response body: {e.response.text}")
+            return None
+        except Exception as e:
+            logger.error(f"An unexpected error occurred during IGDB request: {e}")
+            return None
 
     # --- THIS IS THE MAIN FIXED FUNCTION ---
     async def translate_store_ids_to_igdb_ids(self, platform_name: str, external_ids: list[str]) -> set[int]:
         """
         Translates a list of external store IDs (e.g., Microsoft Store) to a set of unique IGDB game IDs.
         """
+        igdb_ids_by_store_id = await self.map_store_ids_to_igdb_ids(platform_name, external_ids)
+        return set(igdb_ids_by_store_id.values())
+
+    async def map_store_ids_to_igdb_ids(self, platform_name: str, external_ids: list[str]) -> dict[str, int]:
+        """Translate external store IDs to IGDB game IDs, keyed by the store ID each one came from.
+
+        Store IDs that IGDB does not know are left out of the result.
+        """
         if not external_ids:
-            return set()
+            return {}
 
-        platform_category_map = {
-            "microsoft store": 11,
-            "xbox": 11,
-            "steam": 1,
-        }
-        category_id = platform_category_map.get(platform_name.lower())
+        category_id = PLATFORM_CATEGORY_MAP.get(platform_name.lower())
         if not category_id:
             logger.warning(f"Unknown platform name: {platform_name}. Cannot translate IDs.")
-            return set()
+            return {}
 
-        all_igdb_ids = set()
-        # IGDB API has a limit on query size, so we process in batches of 200.
-        batch_size = 200
-        for i in range(0, len(external_ids), batch_size):
-            batch = external_ids[i:i + batch_size]
+        igdb_ids_by_store_id = {}
+        for i in range(0, len(external_ids), IGDB_BATCH_SIZE):
+            batch = external_ids[i:i + IGDB_BATCH_SIZE]
 
             # IGDB expects a comma-separated list of strings, like ("id1", "id2")
-            formatted_ids = ", ".join([f'"{ext_id}"' for ext_id in batch])
+            formatted_ids = ", ".join(f'"{ext_id}"' for ext_id in batch)
+            query = EXTERNAL_GAMES_QUERY.format(category_id=category_id, uids=formatted_ids)
 
-            # The query is now correct for the /external_games endpoint
-            query = (
-                f'fields game.id; '
-                f'where category = {category_id} & uid = ({formatted_ids}); '
-                f'limit 500;' # Max limit
-            )
-
-            response = await self._make_request("external_games", query)
+            response = await self._make_request("external_games", query, cache=True)
 
             if response:
                 for item in response:
                     # The correct path to the ID is item['game']['id']
                     if "game" in item and "id" in item["game"]:
-                        all_igdb_ids.add(item["game"]["id"])
+                        igdb_ids_by_store_id.setdefault(item.get("uid"), item["game"]["id"])
 
-        return all_igdb_ids
+        return igdb_ids_by_store_id
 
-    async def get_game_by_igdb_id(self, igdb_id: int):
+    async def get_game_by_igdb_id(self, igdb_id: int, fields: str = GAME_DETAIL_FIELDS):
         """Fetch detailed game information from IGDB by its unique IGDB ID."""
-        data = (
-            f"fields name, cover.image_id, summary, multiplayer_modes.*, aggregated_rating; "
-            f"where id = {igdb_id};"
-        )
-        return await self._make_request("games", data)
+        key = (igdb_id, fields)
+        request = self._inflight.get(key)
+        if request is None:
+            data = f"fields {fields}; where id = {igdb_id};"
+            request = asyncio.ensure_future(self._make_request("games", data, cache=True))
+            self._inflight[key] = request
+            request.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield the shared request so one caller being cancelled doesn't cancel it for the others
+        return await asyncio.shield(request)
+
+    async def get_games_by_igdb_ids(
+        self, igdb_ids: list[int], fields: str = GAME_DETAIL_FIELDS
+    ) -> dict[int, dict]:
+        """Fetch game information for many IGDB IDs at once, keyed by IGDB ID.
+
+        Uses the same fields as get_game_by_igdb_id by default, requesting up to 200 games per call. The batches are
+        sent concurrently; the rate limiter keeps them within IGDB's request budget.
+        """
+        unique_ids = list(dict.fromkeys(igdb_ids))
+        queries = [
+            f"fields {fields}; "
+            f"where id = ({', '.join(str(igdb_id) for igdb_id in unique_ids[i:i + IGDB_BATCH_SIZE])}); "
+            f"limit 500;"
+            for i in range(0, len(unique_ids), IGDB_BATCH_SIZE)
+        ]
+        responses = await asyncio.gather(*(self._make_request("games", data, cache=True) for data in queries))
+
+        games_by_id = {}
+        for response in responses:
+            for game in response or []:
+                games_by_id[game["id"]] = game
+        return games_by_id
 
-    def get_cover_url(self, image_id: str, size: str = "cover_big"):
+    @staticmethod
+    @lru_cache(maxsize=10000)
+    def get_cover_url(image_id: str, size: str = "cover_big"):
         """Constructs the full URL for a game cover image."""
         if not image_id:
             return None
@@ -132,7 +389,7 @@ class IGDBAPI:
 
     async def search_games(self, query: str, limit: int = 5) -> list[dict]:
         """Searches for games by name using the IGDB API."""
-        data = f"search \"{query}\"; fields name, cover.image_id, summary, aggregated_rating, first_release_date, multiplayer_modes.*; limit {limit};"
+        data = f"search \"{query}\"; fields {GAME_DETAIL_FIELDS}; limit {limit};"
         response = await self._make_request("games", data)
         return response if response else []
 
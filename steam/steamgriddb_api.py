@@ -1,12 +1,15 @@
-import requests
+import httpx
+import orjson
 
+from data import db_manager
+from steam.http_client import get_client
 from utils.config import STEAMGRIDDB_API_KEY
 from utils.logging import logger
 
 BASE_URL = "https://www.steamgriddb.com/api/v2"
 
 
-def get_game_image(igdb_id: int, image_type: str = "grid"):
+async def get_game_image(igdb_id: int, image_type: str = "grid"):
     """Fetch a game image from SteamGridDB using an IGDB ID.
 
     Args:
@@ -28,23 +31,28 @@ def get_game_image(igdb_id: int, image_type: str = "grid"):
     }
 
     try:
-        # First, search for the game by IGDB ID to get its SteamGridDB ID
-        search_url = f"{BASE_URL}/games/id/{igdb_id}?type=igdb"
-        response = requests.get(search_url, headers=headers)
-        response.raise_for_status()  # Raise an exception for HTTP errors
-        search_data = response.json()
+        client = get_client()
+        # The SteamGridDB ID is cached on the game, so only the first lookup needs the search request
+        game_id = db_manager.get_game_sgdb_id(igdb_id)
+        if not game_id:
+            # First, search for the game by IGDB ID to get its SteamGridDB ID
+            search_url = f"{BASE_URL}/games/id/{igdb_id}?type=igdb"
+            response = await client.get(search_url, headers=headers)
+            response.raise_for_status()  # Raise an exception for HTTP errors
+            search_data = orjson.loads(response.content)
 
-        if not search_data.get("success") or not search_data.get("data"):
-            logger.info(f"No game found on SteamGridDB for IGDB ID: {igdb_id}")
-            return None
+            if not search_data.get("success") or not search_data.get("data"):
+                logger.info(f"No game found on SteamGridDB for IGDB ID: {igdb_id}")
+                return None
 
-        game_id = search_data["data"]["id"]
+            game_id = search_data["data"]["id"]
+            db_manager.set_game_sgdb_id(igdb_id, game_id)
 
         # Then, get the image based on SteamGridDB game ID and type
         image_url = f"{BASE_URL}/{image_type}/game/{game_id}"
-        response = requests.get(image_url, headers=headers)
+        response = await client.get(image_url, headers=headers)
         response.raise_for_status()
-        image_data = response.json()
+        image_data = orjson.loads(response.content)
 
         if image_data.get("success") and image_data.get("data"):
             # Return the URL of the first image found
@@ -53,7 +61,7 @@ def get_game_image(igdb_id: int, image_type: str = "grid"):
         logger.info(f"No {image_type} image found for SteamGridDB game ID {game_id} (IGDB ID: {igdb_id}).")
         return None
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Error fetching game image from SteamGridDB: {e}")
         return None
     except (KeyError, IndexError) as e:
@@ -1,162 +1,354 @@
 import asyncio
 import os
 import sys
-from datetime import datetime
-import json
+from datetime import date, datetime, timedelta
+from functools import lru_cache
 
 # Add the project root to the Python path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import orjson
+from peewee import EXCLUDED, Case, Tuple, chunked, fn
+
 from data import db_manager
 from data.models import Game, UserGame, db  # Import necessary models
-from steam.igdb_api import igdb_api
+from steam import http_client
+from steam.igdb_api import extract_player_counts, igdb_api
 from utils.logging import logger
 
+# Number of games whose IGDB IDs are resolved at once. IGDB allows at most 8 open requests per client.
+CONCURRENCY = 8
+
+# Number of games read from the database and sent to IGDB per batch, matching IGDB's batch lookup size.
+CHUNK_SIZE = 200
+
+# Number of chunks fetched from IGDB at once while the previous ones are written to the database.
+FETCH_WORKERS = 2
+
+# Games refreshed from IGDB more recently than this are skipped.
+REFRESH_AFTER = timedelta(days=7)
+
+
+@lru_cache(maxsize=4096)
+def format_release_date(timestamp):
+    """Format an IGDB release timestamp as YYYY-MM-DD.
+
+    Many games share a release day, so results are memoized.
+    """
+    return date.fromtimestamp(timestamp).isoformat()
+
+
+async def resolve_igdb_id(game, igdb_ids_by_steam_appid):
+    """Determine the best IGDB ID for a game, translating its Steam App ID or fuzzy matching its title.
+
+    Steam App IDs are looked up in ``igdb_ids_by_steam_appid``, which is translated for all games up front.
+
+    Returns:
+        int | None: The IGDB ID to use, or None if it could not be determined.
+
+    """
+    igdb_id_to_use = game.igdb_id
+
+    try:
+        # Step 1: Determine the best IGDB ID for this game
+        if not igdb_id_to_use and game.steam_appid:
+            logger.info(f"Attempting to translate Steam App ID {game.steam_appid} for '{game.title}' to IGDB ID.")
+            translated_id = igdb_ids_by_steam_appid.get(str(game.steam_appid))
+            if translated_id:
+                igdb_id_to_use = translated_id
+                logger.info(f"Translated '{game.title}' (Steam App ID: {game.steam_appid}) to IGDB ID: "
+                            f"{igdb_id_to_use}")
+            else:
+                logger.warning(f"Could not translate Steam App ID {game.steam_appid} for '{game.title}' to "
+                               f"IGDB ID.")
+
+        if not igdb_id_to_use and game.title: # If still no IGDB ID, try fuzzy matching
+            logger.info(f"Attempting to resolve canonical IGDB ID for '{game.title}' using fuzzy matching.")
+            resolved_id = await db_manager._resolve_canonical_igdb_id(game.title)
+            if resolved_id:
+                igdb_id_to_use = resolved_id
+                logger.info(f"Resolved '{game.title}' to canonical IGDB ID: {igdb_id_to_use}")
+            else:
+                logger.warning(f"Could not resolve canonical IGDB ID for '{game.title}'.")
+
+        if not igdb_id_to_use:
+            logger.warning(f"No IGDB ID or Steam App ID available for '{game.title}'. "
+                           f"Skipping detail update and de-duplication.")
+        return igdb_id_to_use
+    except Exception as e:
+        logger.error(f"Error resolving IGDB ID for game '{game.title}' (Original ID: {game.igdb_id}): {e}",
+                     exc_info=True)
+        return None
+
+
+def build_game_row(igdb_id, game, game_data):
+    """Build the Game column values for ``igdb_id`` from its IGDB data."""
+    cover_data = game_data.get("cover") or {}
+    multiplayer_modes = game_data.get("multiplayer_modes")
+    min_players, max_players = extract_player_counts(multiplayer_modes)
+    return {
+        'igdb_id': igdb_id,
+        'title': game_data.get("name", game.title),
+        'steam_appid': game.steam_appid, # Keep original steam_appid
+        'cover_url': igdb_api.get_cover_url(cover_data.get("image_id")) if cover_data else None,
+        'description': game_data.get("summary"),
+        'metacritic': int(game_data["aggregated_rating"]) if "aggregated_rating" in game_data else None,
+        'multiplayer_info': orjson.dumps(multiplayer_modes).decode() if multiplayer_modes else None,
+        'release_date': format_release_date(game_data["first_release_date"])
+        if "first_release_date" in game_data else None,
+        'min_players': min_players,
+        'max_players': max_players,
+        'updated_at': datetime.now(),
+    }
+
+
+def apply_igdb_details(game, igdb_id_to_use, game_data, remap, pending_updates, existing_ids):
+    """Work out how a game's IGDB data should be applied, merging it into its canonical entry if it is a duplicate.
+
+    Nothing is written here. Duplicates have their old ID recorded in ``remap`` against the canonical ID
+    so that ``merge_duplicate_games`` can re-point and delete them all at once, and game rows to create or
+    update are appended to ``pending_updates`` for ``flush_game_detail_updates`` to write in bulk.
+    ``existing_ids`` holds the IGDB IDs already stored or queued, and is extended as games are queued.
+
+    Returns:
+        tuple[int, int]: How many games were updated and de-duplicated.
+
+    """
+    updated_count = 0
+    deduplicated_count = 0
+    original_game_id = game.igdb_id # Store original ID for comparison
+
+    try:
+        # Step 3: Handle de-duplication and update game details
+        if igdb_id_to_use in existing_ids and igdb_id_to_use != original_game_id:
+            # Case A: A canonical game entry already exists, and this is a duplicate
+            logger.info(f"De-duplicating '{game.title}' (ID: {original_game_id}) into existing canonical "
+                        f"game (ID: {igdb_id_to_use}).")
+            # Queue the duplicate to be re-pointed to the canonical game and deleted
+            remap[original_game_id] = igdb_id_to_use
+            deduplicated_count += 1
+        else:
+            # Case B: This game is either already canonical, or it becomes the new canonical entry.
+            # Given that igdb_id is the PK, a game whose ID changes is re-created under the canonical ID,
+            # and the old entry is re-pointed and deleted.
+            if original_game_id != igdb_id_to_use:
+                logger.info(f"Updating '{game.title}' (ID: {original_game_id}) to new canonical IGDB ID: "
+                            f"{igdb_id_to_use}.")
+                remap[original_game_id] = igdb_id_to_use
+                deduplicated_count += 1
+            # Either way the row is upserted, creating the canonical entry or updating it in place
+            pending_updates.append(build_game_row(igdb_id_to_use, game, game_data))
+            existing_ids.add(igdb_id_to_use)
+            updated_count += 1
+
+    except Exception as e:
+        logger.error(f"Error processing game '{game.title}' (Original ID: {original_game_id}): {e}",
+                     exc_info=True)
+
+    return updated_count, deduplicated_count
+
+
+def flush_game_detail_updates(pending_updates):
+    """Write queued game rows with one upsert statement per batch.
+
+    New canonical games are inserted; existing ones take the ON CONFLICT path, which leaves their Steam App ID
+    alone and keeps stored release dates and player counts that IGDB didn't provide.
+
+    Args:
+    ----
+        pending_updates (list[dict]): Game column values keyed by field name, including ``igdb_id``.
+
+    """
+    for batch in chunked(pending_updates, CHUNK_SIZE):
+        Game.insert_many(batch).on_conflict(
+            conflict_target=[Game.igdb_id],
+            update={
+                Game.title: EXCLUDED.title,
+                Game.cover_url: EXCLUDED.cover_url,
+                Game.description: EXCLUDED.description,
+                Game.metacritic: EXCLUDED.metacritic,
+                Game.multiplayer_info: EXCLUDED.multiplayer_info,
+                Game.release_date: fn.COALESCE(EXCLUDED.release_date, Game.release_date),
+                Game.min_players: fn.COALESCE(EXCLUDED.min_players, Game.min_players),
+                Game.max_players: fn.COALESCE(EXCLUDED.max_players, Game.max_players),
+                Game.updated_at: EXCLUDED.updated_at,
+            },
+        ).execute()
+
+
+def merge_duplicate_games(remap):
+    """Re-point UserGame entries from duplicate games to their canonical games and delete the duplicates.
+
+    Args:
+    ----
+        remap (dict[int, int]): Maps each duplicate game's IGDB ID to its canonical IGDB ID.
+
+    """
+    if not remap:
+        return
+
+    # A canonical game may itself have been merged into another, so follow each chain to its end
+    for old_id in remap:
+        new_id = remap[old_id]
+        while new_id in remap and new_id != old_id:
+            new_id = remap[new_id]
+        remap[old_id] = new_id
+
+    old_ids = list(remap)
+    try:
+        with db.atomic():
+            # Ownerships already recorded against the canonical game would collide on the primary key,
+            # so drop those duplicates instead of re-pointing them
+            ownerships = (UserGame
+                          .select(UserGame.user, UserGame.game, UserGame.source)
+                          .where(UserGame.game.in_(old_ids + list(set(remap.values()))))
+                          .tuples())
+            kept = set()
+            duplicate_ownerships = []
+            for user_id, game_id, source in sorted(ownerships, key=lambda row: row[1] in remap):
+                key = (user_id, remap.get(game_id, game_id), source)
+                if key in kept:
+                    duplicate_ownerships.append((user_id, game_id, source))
+                else:
+                    kept.add(key)
+            if duplicate_ownerships:
+                UserGame.delete().where(
+                    Tuple(UserGame.user, UserGame.game, UserGame.source).in_(duplicate_ownerships)).execute()
+
+            UserGame.update(game=Case(UserGame.game, list(remap.items()))).where(
+                UserGame.game.in_(old_ids)).execute()
+            Game.delete().where(Game.igdb_id.in_(old_ids)).execute()
+    except Exception as e:
+        logger.error(f"Error merging {len(remap)} duplicate games: {e}", exc_info=True)
+
+
+async def fetch_game_chunk(games, semaphore):
+    """Resolve the IGDB IDs of one chunk of games and fetch their IGDB details.
+
+    Returns:
+        tuple[list, dict[int, dict]]: Each game's resolved IGDB ID, and the IGDB data keyed by IGDB ID.
+
+    """
+    # Translate every Steam App ID in the chunk that needs it in one batched lookup
+    steam_appids = list({str(game.steam_appid) for game in games if not game.igdb_id and game.steam_appid})
+    igdb_ids_by_steam_appid = await igdb_api.map_store_ids_to_igdb_ids("steam", steam_appids)
+
+    async def resolve_igdb_id_bounded(game):
+        async with semaphore:
+            return await resolve_igdb_id(game, igdb_ids_by_steam_appid)
+
+    # Step 1: Resolve every game's IGDB ID. IGDB's request rate is enforced by igdb_api itself,
+    # so games can be resolved concurrently.
+    resolved_ids = await asyncio.gather(*(resolve_igdb_id_bounded(game) for game in games))
+
+    # Step 2: Fetch IGDB data for all resolved IDs in one batched request
+    games_data = await igdb_api.get_games_by_igdb_ids([igdb_id for igdb_id in resolved_ids if igdb_id])
+    return resolved_ids, games_data
+
+
+def write_game_chunk(games, resolved_ids, games_data, remap):
+    """Apply fetched IGDB details to one chunk of games and write them to the database.
+
+    The chunk's duplicates are only added to ``remap`` once its rows have been written, so a chunk that fails to
+    write never has its games merged into canonical entries that don't exist.
+
+    Returns:
+        tuple[int, int]: How many games in the chunk were updated and de-duplicated.
+
+    """
+    # Step 3: Work out each game's row and duplicates, then write the rows in a single transaction
+    updated_count = 0
+    deduplicated_count = 0
+    pending_updates = []
+    chunk_remap = {}
+    # Look up which of the chunk's canonical IDs are already stored in one query
+    existing_ids = set(Game
+                       .select(Game.igdb_id)
+                       .where(Game.igdb_id.in_({igdb_id for igdb_id in resolved_ids if igdb_id}))
+                       .scalars())
+    for game, igdb_id_to_use in zip(games, resolved_ids):
+        if not igdb_id_to_use:
+            continue
+        game_data = games_data.get(igdb_id_to_use)
+        if not game_data:
+            logger.warning(f"No IGDB data found for IGDB ID: {igdb_id_to_use} ('{game.title}'). "
+                           f"Skipping detail update and de-duplication.")
+            continue
+        updated, deduplicated = apply_igdb_details(
+            game, igdb_id_to_use, game_data, chunk_remap, pending_updates, existing_ids)
+        updated_count += updated
+        deduplicated_count += deduplicated
+    with db.atomic():
+        flush_game_detail_updates(pending_updates)
+    remap.update(chunk_remap)
+    return updated_count, deduplicated_count
+
 
 async def update_all_game_details_and_deduplicate():
     """Fetch and update game details from IGDB for all games in the database, and de-duplicate them."""
     logger.info("Starting update and de-duplication of all game details from IGDB...")
-    games_to_process = list(Game.select()) # Get all games before starting modifications
+    semaphore = asyncio.Semaphore(CONCURRENCY)
     updated_count = 0
     deduplicated_count = 0
+    remap = {}
 
-    for game in games_to_process:
-        original_game_id = game.igdb_id # Store original ID for comparison
-        igdb_id_to_use = game.igdb_id
-
-        try:
-            # Step 1: Determine the best IGDB ID for this game
-            if not igdb_id_to_use and game.steam_appid:
-                logger.info(f"Attempting to translate Steam App ID {game.steam_appid} for '{game.title}' to IGDB ID.")
-                translated_ids = await igdb_api.translate_store_ids_to_igdb_ids(
-                    platform_name="steam",
-                    external_ids=[str(game.steam_appid)]
-                )
-                if translated_ids:
-                    igdb_id_to_use = list(translated_ids)[0]
-                    logger.info(f"Translated '{game.title}' (Steam App ID: {game.steam_appid}) to IGDB ID: "
-                                f"{igdb_id_to_use}")
-                else:
-                    logger.warning(f"Could not translate Steam App ID {game.steam_appid} for '{game.title}' to "
-                                   f"IGDB ID.")
-
-            if not igdb_id_to_use and game.title: # If still no IGDB ID, try fuzzy matching
-                logger.info(f"Attempting to resolve canonical IGDB ID for '{game.title}' using fuzzy matching.")
-                resolved_id = await db_manager._resolve_canonical_igdb_id(game.title)
-                if resolved_id:
-                    igdb_id_to_use = resolved_id
-                    logger.info(f"Resolved '{game.title}' to canonical IGDB ID: {igdb_id_to_use}")
-                else:
-                    logger.warning(f"Could not resolve canonical IGDB ID for '{game.title}'.")
+    # Stream games in chunks through a pipeline: a producer reads chunks from the database, FETCH_WORKERS
+    # fetch them from IGDB concurrently, and a single writer applies them. The bounded queues keep at most
+    # a few chunks in memory at a time. Duplicates are not deleted until every chunk is done, so the scan
+    # never loses rows under it.
+    # Only the columns the pipeline reads are selected, as plain rows rather than model instances,
+    # and only for games that are new or stale.
+    games_query = (Game
+                   .select(Game.igdb_id, Game.steam_appid, Game.title)
+                   .where(Game.updated_at.is_null() | (Game.updated_at < datetime.now() - REFRESH_AFTER))
+                   .namedtuples())
+    chunks = asyncio.Queue(maxsize=FETCH_WORKERS)
+    fetched_chunks = asyncio.Queue(maxsize=FETCH_WORKERS)
 
-            if not igdb_id_to_use:
-                logger.warning(f"No IGDB ID or Steam App ID available for '{game.title}'. "
-                               f"Skipping detail update and de-duplication.")
+    async def produce_chunks():
+        for games in chunked(games_query.iterator(), CHUNK_SIZE):
+            await chunks.put(games)
+        for _ in range(FETCH_WORKERS):
+            await chunks.put(None)
+
+    async def fetch_chunks():
+        while (games := await chunks.get()) is not None:
+            try:
+                resolved_ids, games_data = await fetch_game_chunk(games, semaphore)
+            except Exception as e:
+                # Skip just this chunk; its games are still stale, so the next run picks them up again
+                logger.error(f"Error fetching IGDB details for a chunk of {len(games)} games: {e}", exc_info=True)
                 continue
+            await fetched_chunks.put((games, resolved_ids, games_data))
+
+    async def fetch_all_chunks():
+        async with asyncio.TaskGroup() as fetchers:
+            fetchers.create_task(produce_chunks())
+            for _ in range(FETCH_WORKERS):
+                fetchers.create_task(fetch_chunks())
+        await fetched_chunks.put(None)
 
-            # Step 2: Fetch comprehensive IGDB data for the determined IGDB ID
-            game_data_list = await igdb_api.get_game_by_igdb_id(igdb_id_to_use)
-            if not game_data_list:
-                logger.warning(f"No IGDB data found for IGDB ID: {igdb_id_to_use} ('{game.title}'). "
-                               f"Skipping detail update and de-duplication.")
+    async def write_chunks():
+        nonlocal updated_count, deduplicated_count
+        while (chunk := await fetched_chunks.get()) is not None:
+            try:
+                updated, deduplicated = write_game_chunk(*chunk, remap)
+            except Exception as e:
+                logger.error(f"Error writing IGDB details for a chunk of {len(chunk[0])} games: {e}", exc_info=True)
                 continue
-            game_data = game_data_list[0]
-
-            # Step 3: Handle de-duplication and update game details
-            with db.atomic():
-                existing_canonical_game = Game.get_or_none(Game.igdb_id == igdb_id_to_use)
-
-                if existing_canonical_game and existing_canonical_game.igdb_id != original_game_id:
-                    # Case A: A canonical game entry already exists, and this is a duplicate
-                    logger.info(f"De-duplicating '{game.title}' (ID: {original_game_id}) into existing canonical "
-                                f"game '{existing_canonical_game.title}' (ID: {existing_canonical_game.igdb_id}).")
-                    # Update UserGame entries to point to the canonical game
-                    UserGame.update(game=existing_canonical_game.igdb_id).where(
-                        UserGame.game == original_game_id).execute()
-                    # Delete the duplicate game entry
-                    game.delete_instance()
-                    deduplicated_count += 1
-                else:
-                    # Case B: This game is either already canonical, or it becomes the new canonical entry
-                    # Update the game's primary key if it needs to become canonical
-                    if game.igdb_id != igdb_id_to_use:
-                        logger.info(f"Updating '{game.title}' (ID: {game.igdb_id}) to new canonical IGDB ID: "
-                                    f"{igdb_id_to_use}.")
-                        # This is tricky with Peewee and primary keys. A common pattern is to:
-                        # 1. Create a new game entry with the canonical ID and updated details.
-                        # 2. Re-point UserGame entries to the new ID.
-                        # 3. Delete the old entry.
-                        # For simplicity and to avoid potential data loss, we'll try to update in place if possible,
-                        # but if the PK changes, it's safer to re-create and re-point.
-                        # Given that igdb_id is the PK, we must re-create if it changes.
-
-                        # Create a new canonical game entry with updated details
-                        cover_data = game_data.get("cover", {})
-                        multiplayer_modes = game_data.get("multiplayer_modes")
-
-                        new_game_data = {
-                            'igdb_id': igdb_id_to_use,
-                            'title': game_data.get("name", game.title),
-                            'steam_appid': game.steam_appid, # Keep original steam_appid
-                            'cover_url': igdb_api.get_cover_url(cover_data["image_id"]) if cover_data else None,
-                            'description': game_data.get("summary"),
-                            'metacritic': int(game_data["aggregated_rating"]) if "aggregated_rating" in game_data else None,
-                            'multiplayer_info': json.dumps(multiplayer_modes) if multiplayer_modes else None,
-                            'release_date': datetime.fromtimestamp(game_data["first_release_date"]).strftime(
-                                '%Y-%m-%d') if "first_release_date" in game_data else None,
-                            'min_players': (multiplayer_modes[0].get("splitscreen_minimum") or
-                                            multiplayer_modes[0].get("offline_minimum") or
-                                            multiplayer_modes[0].get("online_minimum")) if multiplayer_modes else None,
-                            'max_players': (multiplayer_modes[0].get("splitscreen_maximum") or
-                                            multiplayer_modes[0].get("offline_maximum") or
-                                            multiplayer_modes[0].get("online_maximum")) if multiplayer_modes else None,
-                        }
-
-                        # Use get_or_create to avoid issues if it was created by another process
-                        canonical_game, created_new = Game.get_or_create(igdb_id=igdb_id_to_use, defaults=new_game_data)
-
-                        if not created_new: # If it already existed, update its details
-                            for key, value in new_game_data.items():
-                                if key != 'igdb_id' and value is not None: # Don't update PK, only if value not None
-                                    setattr(canonical_game, key, value)
-                            canonical_game.save()
-
-                        # Re-point UserGame entries to the new canonical game
-                        UserGame.update(game=canonical_game.igdb_id).where(UserGame.game == original_game_id).execute()
-                        # Delete the old game entry
-                        if original_game_id != canonical_game.igdb_id: # Only delete if it's a different entry
-                            Game.get(Game.igdb_id == original_game_id).delete_instance()
-                            deduplicated_count += 1
-                        updated_count += 1
-                    else:
-                        # If the IGDB ID is already correct, just update details in place
-                        game.title = game_data.get("name", game.title)
-                        cover_data = game_data.get("cover", {})
-                        game.cover_url = igdb_api.get_cover_url(cover_data.get("image_id")) if cover_data else None
-                        game.description = game_data.get("summary")
-                        game.metacritic = int(game_data["aggregated_rating"]) if "aggregated_rating" in game_data else None
-                        multiplayer_modes = game_data.get("multiplayer_modes")
-                        game.multiplayer_info = json.dumps(multiplayer_modes) if multiplayer_modes else None
-                        if "first_release_date" in game_data:
-                            game.release_date = datetime.fromtimestamp(
-                                game_data["first_release_date"]).strftime('%Y-%m-%d')
-                        if multiplayer_modes:
-                            mp_modes = multiplayer_modes[0]
-                            game.min_players = (mp_modes.get("splitscreen_minimum") or
-                                                mp_modes.get("offline_minimum") or
-                                                mp_modes.get("online_minimum"))
-                            game.max_players = (mp_modes.get("splitscreen_maximum") or
-                                                mp_modes.get("offline_maximum") or
-                                                mp_modes.get("online_maximum"))
-                        game.save()
-                        updated_count += 1
-
-        except Exception as e:
-            logger.error(f"Error processing game '{game.title}' (Original ID: {original_game_id}): {e}",
-                         exc_info=True)
-
-        # Be kind to the API - add a small delay
-        await asyncio.sleep(0.1) # 100 ms delay
+            updated_count += updated
+            deduplicated_count += deduplicated
+
+    # If any stage fails outright, the task groups cancel the others rather than leave them blocked on a queue
+    try:
+        async with asyncio.TaskGroup() as pipeline:
+            pipeline.create_task(fetch_all_chunks())
+            pipeline.create_task(write_chunks())
+    except Exception as e:
+        logger.error(f"Game details update stopped early: {e}", exc_info=True)
+
+    # Step 4: Merge the duplicates found in every chunk that was written, in one transaction
+    merge_duplicate_games(remap)
 
     logger.info(f"Finished updating and de-duplicating game details. Total games updated: {updated_count}, "
                 f"de-duplicated: {deduplicated_count}.")
@@ -165,8 +357,11 @@ async def update_all_game_details_and_deduplicate():
 async def main():
     """Define the main entry point for the update script."""
     db_manager.db.connect()
-    await update_all_game_details_and_deduplicate()
-    db_manager.db.close()
+    try:
+        await update_all_game_details_and_deduplicate()
+    finally:
+        await http_client.aclose()
+        db_manager.db.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,131 @@
+import pytest
+from peewee import EXCLUDED
+
+from data.database import TEST_DATABASE_URI, set_test_database
+from data.models import (
+    Game,
+    GameExclusion,
+    GameNight,
+    GameNightAttendee,
+    GamePassGame,
+    GameVote,
+    GuildConfig,
+    Poll,
+    PollResponse,
+    User,
+    UserAvailability,
+    UserGame,
+    VoiceActivity,
+    db,
+)
+
+TEST_MODELS = [
+    User,
+    Game,
+    UserGame,
+    GameNight,
+    GameNightAttendee,
+    GameExclusion,
+    VoiceActivity,
+    GameVote,
+    UserAvailability,
+    Poll,
+    PollResponse,
+    GuildConfig,
+    GamePassGame,
+]
+
+
+def raw_insert_many(model, columns, rows):
+    """Insert rows straight through the driver with one prepared statement, bypassing the ORM.
+
+    The given values are not converted on the way in, so they must already be in their database form, with
+    foreign keys given as plain IDs. Fields left out are filled from their model defaults, which SQLite does not
+    know about.
+
+    Args:
+    ----
+        model: The model whose table the rows go into.
+        columns (list[str]): The model field names, in the order their values appear in each row.
+        rows (list[tuple]): The rows to insert.
+
+    """
+    defaulted = [field for name, field in model._meta.fields.items()
+                 if name not in columns and field.default is not None]
+    default_values = tuple(
+        field.db_value(field.default() if callable(field.default) else field.default) for field in defaulted)
+    fields = [model._meta.fields[column] for column in columns] + defaulted
+    sql = 'INSERT INTO "{}" ({}) VALUES ({})'.format(
+        model._meta.table_name,
+        ', '.join(f'"{field.column_name}"' for field in fields),
+        ', '.join('?' * len(fields)),
+    )
+    with db.atomic():
+        db.cursor().executemany(sql, [tuple(row) + default_values for row in rows])
+
+
+def bulk_add_users(users):
+    """Add or reactivate several users at once from (discord_id, username) pairs.
+
+    Returns the users' database IDs in the order they were given.
+    """
+    rows = [{'discord_id': int(discord_id), 'username': username, 'is_active': True} for discord_id, username in users]
+    with db.atomic():
+        query = (User
+                 .insert_many(rows)
+                 .on_conflict(conflict_target=[User.discord_id],
+                              update={User.username: EXCLUDED.username, User.is_active: True})
+                 .returning(User.id, User.discord_id))
+        ids_by_discord_id = {row.discord_id: row.id for row in query.execute()}
+    return [ids_by_discord_id[row['discord_id']] for row in rows]
+
+
+def bulk_add_game_nights(game_nights):
+    """Add several game nights and their attendees in one transaction.
+
+    Each entry holds GameNight column values, plus an optional ``attendees`` dict mapping user IDs to
+    attendance statuses. Returns the new game nights' IDs in the order they were given.
+    """
+    with db.atomic():
+        rows = [{key: value for key, value in game_night.items() if key != 'attendees'} for game_night in game_nights]
+        # Rows from one INSERT get ascending IDs, so sorting restores the input order
+        game_night_ids = sorted(row.id for row in GameNight.insert_many(rows).returning(GameNight.id).execute())
+        attendees = [
+            {'game_night': game_night_id, 'user': user_id, 'status': status}
+            for game_night_id, game_night in zip(game_night_ids, game_nights)
+            for user_id, status in game_night.get('attendees', {}).items()
+        ]
+        if attendees:
+            GameNightAttendee.insert_many(attendees).execute()
+    return game_night_ids
+
+
+def create_test_schema():
+    """Point the global database at the shared in-memory test database and create every table in it."""
+    set_test_database()
+    db.connect()
+    db.create_tables(TEST_MODELS)
+
+
+@pytest.fixture(scope="session")
+def test_database():
+    """Create the schema once in an in-memory database shared by the whole test session."""
+    create_test_schema()
+    yield db
+    db.close()
+
+
+@pytest.fixture(autouse=True)
+def clean_database(request, test_database):
+    """Run every test inside a transaction on the shared test database and roll it back afterwards."""
+    if request.node.get_closest_marker("database_file"):
+        # Re-pointing the database closes its connection, which cannot happen inside a transaction
+        yield test_database
+        return
+    # Tests that call initialize_database() re-point the global database at the real file
+    if test_database.database != TEST_DATABASE_URI:
+        create_test_schema()
+    # Transactions opened by the code under test nest as savepoints inside this one
+    with test_database.atomic() as transaction:
+        yield test_database
+        transaction.rollback()
@@ -13,17 +13,15 @@ class TestDbSanity(unittest.TestCase):
     """A basic sanity check for the database connection and simple operations."""
 
     def setUp(self):
-        """Set up a temporary, in-memory database for testing."""
-        import tempfile
-        self.temp_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False).name
-        db.init(self.temp_db_file)
+        """Set up an in-memory database for testing."""
+        db.init(":memory:")
         db.connect()
         db.create_tables([User, Game])
 
     def tearDown(self):
-        """Close the database connection and remove the temporary file."""
+        """Drop the tables and close the database connection."""
+        db.drop_tables([User, Game])
         db.close()
-        os.unlink(self.temp_db_file)
 
     def test_add_user_and_retrieve(self):
         """Test that a user can be added and then retrieved correctly."""
@@ -34,7 +32,7 @@ class TestDbSanity(unittest.TestCase):
 
         retrieved_user = db_manager.get_user_by_discord_id(discord_id)
         self.assertIsNotNone(retrieved_user)
-        self.assertEqual(retrieved_user.discord_id, discord_id)
+        self.assertEqual(retrieved_user.discord_id, int(discord_id))
         self.assertEqual(retrieved_user.username, username)
 
     def test_add_game_and_retrieve(self):
@@ -6,7 +6,7 @@ import discord
 import pytest
 from discord.ext import commands
 
-from bot.cogs.automation_tasks import AutomationTasks, AvailabilityPollView
+from bot.cogs.automation_tasks import AutomationTasks, AvailabilityPollView, days_any_user_available
 from data import db_manager
 
 
@@ -27,7 +27,6 @@ def automation_tasks_cog(mock_bot):
     return AutomationTasks(mock_bot)
 
 
-@pytest.mark.asyncio
 async def test_start_weekly_availability_poll_no_filtered_slots(automation_tasks_cog, mock_bot):
     """Test that the poll is not started if no suitable time slots are found."""
     with patch('data.db_manager.get_all_users_weekly_availability', return_value={}):
@@ -36,7 +35,6 @@ async def test_start_weekly_availability_poll_no_filtered_slots(automation_tasks
             mock_bot.get_channel.return_value.send.assert_not_called()
 
 
-@pytest.mark.asyncio
 async def test_start_weekly_availability_poll_success(automation_tasks_cog, mock_bot):
     """Test the successful creation of a weekly availability poll."""
     mock_user = MagicMock(discord_id="123", id=1)
@@ -58,7 +56,18 @@ async def test_start_weekly_availability_poll_success(automation_tasks_cog, mock
                     mock_bot.scheduler.add_job.assert_called_once()
 
 
-@pytest.mark.asyncio
+def test_get_custom_pattern_reuses_decoded_pattern(automation_tasks_cog):
+    """Test that a guild's custom pattern is only decoded again when its JSON changes."""
+    pattern_json = json.dumps({"0": [18]})
+    with patch('bot.cogs.automation_tasks.json.loads', wraps=json.loads) as mock_loads:
+        assert automation_tasks_cog._get_custom_pattern(123, pattern_json) == {"0": [18]}
+        assert automation_tasks_cog._get_custom_pattern(123, pattern_json) == {"0": [18]}
+        mock_loads.assert_called_once()
+
+        assert automation_tasks_cog._get_custom_pattern(123, json.dumps({"1": [20]})) == {"1": [20]}
+        assert mock_loads.call_count == 2
+
+
 async def test_start_weekly_availability_poll_with_custom_pattern(automation_tasks_cog, mock_bot):
     """Test that the weekly poll correctly uses a guild's custom availability pattern."""
     mock_user = MagicMock(discord_id="123", id=1)
@@ -100,20 +109,8 @@ async def test_start_weekly_availability_poll_with_custom_pattern(automation_tas
                                     )
 
                         # Filter expected slots by user availability (mocked to be all days)
-                        all_users_weekly_availability = db_manager.get_all_users_weekly_availability()
-                        final_expected_slots = []
-                        for slot in expected_slots:
-                            day_of_week_num = slot.weekday()
-                            is_any_user_available = False
-                            for _, available_days_str in all_users_weekly_availability.items():
-                                if available_days_str:
-                                    available_days_nums = [
-                                        int(d) for d in available_days_str.split(',')]
-                                    if day_of_week_num in available_days_nums:
-                                        is_any_user_available = True
-                                        break
-                            if is_any_user_available:
-                                final_expected_slots.append(slot)
+                        available_days = days_any_user_available(db_manager.get_all_users_weekly_availability())
+                        final_expected_slots = [slot for slot in expected_slots if slot.weekday() in available_days]
 
                         # Compare the generated slots with the expected slots
                         assert len(suggested_slots) == len(final_expected_slots)
@@ -0,0 +1,145 @@
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from data import database, db_manager
+from data.models import db
+from tests.conftest import TEST_MODELS
+
+# The schema of data/users.db as shipped before the migrations were run by initialize_database()
+BASELINE_SCHEMA = """
+CREATE TABLE "user" ("id" INTEGER NOT NULL PRIMARY KEY, "discord_id" VARCHAR(255) NOT NULL, "steam_id" VARCHAR(255),
+    "username" VARCHAR(255), "is_active" INTEGER NOT NULL, "has_game_pass" INTEGER NOT NULL,
+    "default_reminder_offset_minutes" INTEGER NOT NULL, "xbox_refresh_token" TEXT, "xbox_xuid" VARCHAR(255),
+    "receive_voice_notifications" INTEGER NOT NULL);
+CREATE UNIQUE INDEX "user_discord_id" ON "user" ("discord_id");
+CREATE TABLE "game" ("igdb_id" INTEGER NOT NULL PRIMARY KEY, "steam_appid" VARCHAR(255), "title" VARCHAR(255) NOT NULL,
+    "cover_url" VARCHAR(255), "multiplayer_info" TEXT, "tags" VARCHAR(255), "min_players" INTEGER,
+    "max_players" INTEGER, "last_played" DATETIME, "release_date" VARCHAR(255), "description" VARCHAR(255),
+    "metacritic" INTEGER);
+CREATE TABLE "usergame" ("user_id" INTEGER NOT NULL, "game_id" INTEGER NOT NULL, "source" VARCHAR(255) NOT NULL,
+    "liked" INTEGER NOT NULL, "disliked" INTEGER NOT NULL, "is_installed" INTEGER NOT NULL,
+    PRIMARY KEY ("user_id", "game_id", "source"), FOREIGN KEY ("user_id") REFERENCES "user" ("id"),
+    FOREIGN KEY ("game_id") REFERENCES "game" ("igdb_id"));
+CREATE TABLE "gamenight" ("id" INTEGER NOT NULL PRIMARY KEY, "organizer_id" INTEGER NOT NULL,
+    "scheduled_time" DATETIME NOT NULL, "channel_id" VARCHAR(255) NOT NULL,
+    "availability_poll_message_id" VARCHAR(255), "game_poll_message_id" VARCHAR(255),
+    "suggested_games_list" VARCHAR(255), "poll_close_time" DATETIME, "selected_game_id" INTEGER,
+    FOREIGN KEY ("organizer_id") REFERENCES "user" ("id"),
+    FOREIGN KEY ("selected_game_id") REFERENCES "game" ("igdb_id"));
+CREATE TABLE "gamenightattendee" ("game_night_id" INTEGER NOT NULL, "user_id" INTEGER NOT NULL,
+    "status" VARCHAR(255) NOT NULL, PRIMARY KEY ("game_night_id", "user_id"),
+    FOREIGN KEY ("game_night_id") REFERENCES "gamenight" ("id"), FOREIGN KEY ("user_id") REFERENCES "user" ("id"));
+CREATE TABLE "gameexclusion" ("user_id" INTEGER NOT NULL, "game_id" INTEGER NOT NULL,
+    PRIMARY KEY ("user_id", "game_id"), FOREIGN KEY ("user_id") REFERENCES "user" ("id"),
+    FOREIGN KEY ("game_id") REFERENCES "game" ("igdb_id"));
+CREATE TABLE "voiceactivity" ("id" INTEGER NOT NULL PRIMARY KEY, "user_id" INTEGER NOT NULL,
+    "guild_id" VARCHAR(255) NOT NULL, "channel_id" VARCHAR(255) NOT NULL, "join_time" DATETIME NOT NULL,
+    "leave_time" DATETIME, "duration_seconds" INTEGER, FOREIGN KEY ("user_id") REFERENCES "user" ("id"));
+CREATE TABLE "gamevote" ("game_night_id" INTEGER NOT NULL, "user_id" INTEGER NOT NULL, "game_id" INTEGER NOT NULL,
+    PRIMARY KEY ("game_night_id", "user_id"), FOREIGN KEY ("game_night_id") REFERENCES "gamenight" ("id"),
+    FOREIGN KEY ("user_id") REFERENCES "user" ("id"), FOREIGN KEY ("game_id") REFERENCES "game" ("igdb_id"));
+CREATE TABLE "useravailability" ("user_id" INTEGER NOT NULL PRIMARY KEY, "available_days" VARCHAR(255),
+    FOREIGN KEY ("user_id") REFERENCES "user" ("id"));
+CREATE TABLE "poll" ("id" INTEGER NOT NULL PRIMARY KEY, "message_id" VARCHAR(255) NOT NULL,
+    "channel_id" VARCHAR(255) NOT NULL, "poll_type" VARCHAR(255) NOT NULL, "start_time" DATETIME NOT NULL,
+    "end_time" DATETIME NOT NULL, "status" VARCHAR(255) NOT NULL, "related_game_night_id" INTEGER,
+    "suggested_slots_json" VARCHAR(255), "expected_participants_json" VARCHAR(255),
+    FOREIGN KEY ("related_game_night_id") REFERENCES "gamenight" ("id"));
+CREATE UNIQUE INDEX "poll_message_id" ON "poll" ("message_id");
+CREATE TABLE "pollresponse" ("poll_id" INTEGER NOT NULL, "user_id" INTEGER NOT NULL, "selected_options" VARCHAR(255),
+    "timestamp" DATETIME NOT NULL, PRIMARY KEY ("poll_id", "user_id"), FOREIGN KEY ("poll_id") REFERENCES "poll" ("id"),
+    FOREIGN KEY ("user_id") REFERENCES "user" ("id"));
+CREATE TABLE "guildconfig" ("id" INTEGER NOT NULL PRIMARY KEY, "guild_id" VARCHAR(255) NOT NULL,
+    "main_channel_id" VARCHAR(255), "planning_channel_id" VARCHAR(255), "custom_availability_pattern" TEXT,
+    "voice_notification_channel_id" VARCHAR(255));
+CREATE UNIQUE INDEX "guildconfig_guild_id" ON "guildconfig" ("guild_id");
+CREATE TABLE "game_pass_catalog" ("id" INTEGER NOT NULL PRIMARY KEY, "title" VARCHAR(255) NOT NULL,
+    "microsoft_store_id" VARCHAR(255) NOT NULL);
+
+INSERT INTO "user" VALUES (1, '123456789012345678', NULL, 'Organizer', 1, 0, 60, NULL, NULL, 1);
+INSERT INTO "user" VALUES (2, '223456789012345678', NULL, 'Attendee', 1, 0, 60, NULL, NULL, 1);
+INSERT INTO "game" ("igdb_id", "title") VALUES (1942, 'Game A');
+INSERT INTO "gamenight" ("id", "organizer_id", "scheduled_time", "channel_id")
+    VALUES (1, 1, '2024-07-10 19:00:00', '323456789012345678');
+INSERT INTO "gamenightattendee" VALUES (1, 1, 'attending'), (1, 2, 'maybe');
+"""
+
+
+@pytest.fixture
+def baseline_database(tmp_path, monkeypatch):
+    """Create a database file with the pre-migration schema and point initialize_database() at it."""
+    db_file = tmp_path / "users.db"
+    connection = sqlite3.connect(db_file)
+    connection.executescript(BASELINE_SCHEMA)
+    connection.close()
+    monkeypatch.setattr(database, "DATABASE_FILE", str(db_file))
+    yield db_file
+    db.close()
+
+
+@pytest.mark.database_file
+def test_initialize_database_migrates_baseline_schema(baseline_database):
+    """Test that initializing an existing database brings every table up to the current models."""
+    database.initialize_database()
+
+    for model in TEST_MODELS:
+        columns = {column.name for column in db.get_columns(model._meta.table_name)}
+        assert {field.column_name for field in model._meta.sorted_fields} <= columns, model.__name__
+
+
+@pytest.mark.database_file
+def test_game_queries_work_after_migrating_baseline_schema(baseline_database):
+    """Test that the games of an existing database are readable and can cache their SteamGridDB ID."""
+    database.initialize_database()
+
+    assert [game.title for game in db_manager.get_all_games()] == ["Game A"]
+    db_manager.set_game_sgdb_id(1942, 5050)
+    assert db_manager.get_game_sgdb_id(1942) == 5050
+
+
+@pytest.mark.database_file
+def test_snowflake_ids_are_integers_after_migrating_baseline_schema(baseline_database):
+    """Test that Discord IDs stored as strings by an existing database are converted to integers."""
+    database.initialize_database()
+
+    assert db.execute_sql('SELECT DISTINCT typeof(discord_id) FROM "user"').fetchall() == [("integer",)]
+    assert db.execute_sql("SELECT typeof(channel_id) FROM gamenight").fetchall() == [("integer",)]
+    assert db_manager.get_user_by_discord_id("123456789012345678").username == "Organizer"
+
+
+@pytest.mark.database_file
+def test_poll_response_timestamp_defaults_to_local_time_after_migrating_baseline_schema(baseline_database):
+    """Test that existing databases get the local-time default for poll response timestamps."""
+    database.initialize_database()
+
+    now = datetime.now()
+    poll_id = db_manager.create_poll("1", "2", "availability", now, now + timedelta(days=1), "[]", "[]")
+    db_manager.record_poll_response(poll_id, 1, "0")
+    assert abs(db_manager.get_poll_responses(poll_id)[0].timestamp - now) < timedelta(minutes=1)
+
+
+@pytest.mark.database_file
+def test_initialize_database_runs_each_migration_once(baseline_database):
+    """Test that a second start neither re-runs nor re-records the migrations."""
+    database.initialize_database()
+    applied = db.execute_sql('SELECT name, applied_at FROM appliedmigration ORDER BY name').fetchall()
+    assert applied
+
+    database.initialize_database()
+    assert db.execute_sql('SELECT name, applied_at FROM appliedmigration ORDER BY name').fetchall() == applied
+
+
+@pytest.mark.database_file
+def test_initialize_database_records_migrations_for_new_database(tmp_path, monkeypatch):
+    """Test that a new database is created from the models and only records the migrations."""
+    monkeypatch.setattr(database, "DATABASE_FILE", str(tmp_path / "new.db"))
+    try:
+        database.initialize_database()
+        applied = [name for (name,) in db.execute_sql('SELECT name FROM appliedmigration ORDER BY name')]
+        migrations_dir = os.path.join(os.path.dirname(database.__file__), "..", "migrations")
+        assert applied == sorted(name for name in os.listdir(migrations_dir) if name.endswith(".py"))
+    finally:
+        db.close()
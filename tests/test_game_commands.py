@@ -1,29 +1,27 @@
 from unittest.mock import AsyncMock, MagicMock
 
-import discord
 import pytest
-import pytest_asyncio  # New import
-from discord.ext import commands
 
-from bot.cogs.game_commands import GameCommands
-from data.database import initialize_database  # New import
-from data.models import Game, User, UserGame, db
 
+@pytest.fixture(scope="module")
+def mock_bot():
+    """Mock the Discord bot for testing, with the GameCommands cog attached and shared by the module."""
+    # discord.py is imported here rather than at module level so collecting this file stays cheap
+    from discord.ext import commands
 
-@pytest_asyncio.fixture
-async def mock_bot():
-    """Mock the Discord bot for testing."""
-    intents = discord.Intents.default()
-    intents.members = True
-    intents.message_content = True
-    bot = commands.Bot(command_prefix="!", intents=intents, application_id=1234567890) # Mock application ID
+    from bot.cogs.game_commands import GameCommands
+
+    # A spec'd mock stands in for commands.Bot, which would otherwise build its HTTP client and command tree
+    bot = AsyncMock(spec=commands.Bot)
     cog = GameCommands(bot)
-    await bot.add_cog(cog)
+    bot.get_cog.return_value = cog
     return bot
 
 @pytest.fixture
 def mock_interaction():
     """Mock a Discord interaction for testing."""
+    import discord
+
     interaction = AsyncMock(spec=discord.Interaction)
     interaction.response = MagicMock()
     interaction.response.defer = AsyncMock()
@@ -34,12 +32,3 @@ def mock_interaction():
     interaction.user = MagicMock(id=12345, display_name="TestUser")
     return interaction
 
-@pytest.fixture(autouse=True)
-def setup_test_db():
-    """Set up and tear down a temporary test database."""
-    initialize_database()
-    yield
-    db.drop_tables([User, Game, UserGame])
-    db.close()
-
-
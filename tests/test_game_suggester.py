@@ -1,130 +1,200 @@
-import os
-import sys
-import unittest
+import random
 from datetime import datetime, timedelta
 
-# Add the project root to the Python path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pytest
 
 from bot import game_suggester
-from data import database, db_manager
-from data.database import initialize_database  # New import
-from data.models import Game, db
-
-
-class TestGameSuggester(unittest.TestCase):
-    """Tests for the game suggester module."""
-
-    def setUp(self):
-        """Set up a temporary database and populate it with test data."""
-        self.db_file = f"./data/test_users_{self._testMethodName}.db"
-        database.set_database_file(self.db_file)
-        initialize_database() # Use the centralized initialization
-
-        # Add some test users and games
-        self.user1_id = db_manager.add_user("1", "User1")
-        self.user2_id = db_manager.add_user("2", "User2")
-        self.user3_id = db_manager.add_user("3", "User3")
-
-        db_manager.add_game(
-            "Game A", min_players=2, max_players=4, tags="strategy,coop",
-            release_date="2023-01-01", description="Desc A"
-        )
-        db_manager.add_game(
-            "Game B", min_players=3, max_players=5, tags="action,rpg",
-            release_date="2023-01-01", description="Desc B"
-        )
-        db_manager.add_game(
-            "Game C", min_players=2, max_players=2, tags="puzzle",
-            release_date="2023-01-01", description="Desc C"
-        )
-        db_manager.add_game(
-            "Game D", min_players=4, max_players=6, tags="strategy",
-            release_date="2023-01-01", description="Desc D"
-        )
-
-        self.game1 = db_manager.get_game_by_name("Game A")
-        self.game2 = db_manager.get_game_by_name("Game B")
-        self.game3 = db_manager.get_game_by_name("Game C")
-        self.game4 = db_manager.get_game_by_name("Game D")
-
-        db_manager.add_user_game(self.user1_id, self.game1.id, "PC")
-        db_manager.add_user_game(self.user2_id, self.game1.id, "PC")
-        db_manager.add_user_game(self.user3_id, self.game1.id, "PC")
-
-        db_manager.add_user_game(self.user1_id, self.game2.id, "PC")
-        db_manager.add_user_game(self.user2_id, self.game2.id, "PC")
-        db_manager.add_user_game(self.user3_id, self.game2.id, "PC")
-
-        db_manager.add_user_game(self.user1_id, self.game3.id, "PC")
-
-        db_manager.add_user_game(self.user2_id, self.game4.id, "PC")
-        db_manager.add_user_game(self.user3_id, self.game4.id, "PC")
-
-    def tearDown(self):
-        """Close the database connection and remove the temporary database file."""
-        db.close()
-        if os.path.exists(self.db_file):
-            os.remove(self.db_file)
-
-    def test_suggest_games_no_users(self):
-        """Test that no suggestions are returned when the user list is empty."""
-        suggestions = game_suggester.suggest_games([])
-        self.assertEqual(suggestions, [])
-
-    def test_suggest_games_all_users_common_game(self):
-        """Test suggesting games when all users have a common game."""
-        suggestions = game_suggester.suggest_games([self.user1_id, self.user2_id, self.user3_id])
-        self.assertIn(self.game1, suggestions)
-        self.assertEqual(len(suggestions), 2)
-
-    def test_suggest_games_group_size_match(self):
-        """Test that suggestions are filtered by group size."""
-        suggestions = game_suggester.suggest_games([self.user1_id, self.user2_id], group_size=3)
-        self.assertIn(self.game1, suggestions)  # Min 2, Max 4
-        self.assertIn(self.game2, suggestions)  # Min 3, Max 5
-
-    def test_suggest_games_last_played_scoring(self):
-        """Test that games played less recently are scored higher."""
-        # Mark Game A as played recently, Game B as played long ago
-        Game.update(last_played=(datetime.now() - timedelta(days=1))).where(Game.id == self.game1.id).execute()
-        Game.update(last_played=(datetime.now() - timedelta(days=10))).where(Game.id == self.game2.id).execute()
-
-        suggestions = game_suggester.suggest_games([self.user1_id, self.user2_id])
-        # Game B should be suggested before Game A due to older last_played date
-        self.assertLess(suggestions.index(self.game2), suggestions.index(self.game1))
-
-    def test_suggest_games_preferred_tags(self):
-        """Test that suggestions can be filtered by preferred tags."""
-        suggestions = game_suggester.suggest_games(
-            [self.user1_id, self.user2_id, self.user3_id], preferred_tags=["strategy"]
-        )
-        self.assertIn(self.game1, suggestions)  # Game A has 'strategy'
-        self.assertIn(self.game2, suggestions)  # Game B is still suggested but should be lower ranked
-        self.assertLess(suggestions.index(self.game1), suggestions.index(self.game2))
-
-    def test_suggest_games_liked_disliked_scoring(self):
-        """Test that liked games are boosted and disliked games are penalized."""
-        # User1 likes Game B, dislikes Game A
-        db_manager.set_game_liked_status(self.user1_id, self.game2.id, True)
-        db_manager.set_game_disliked_status(self.user1_id, self.game1.id, True)
-
-        suggestions = game_suggester.suggest_games([self.user1_id, self.user2_id])
-        # Game B should be ranked higher than Game A due to like/dislike
-        self.assertLess(suggestions.index(self.game2), suggestions.index(self.game1))
-
-    def test_suggest_games_recently_won_penalty(self):
-        """Test that recently won games are penalized."""
-        # Create a recent game night where Game A was selected
-        recent_time = datetime.now() - timedelta(days=5)
-        game_night_id = db_manager.add_game_night_event(self.user1_id, recent_time, "channel_id")
-        db_manager.update_game_night_selected_game(game_night_id, self.game1.id)
-
-        suggestions = game_suggester.suggest_games([self.user1_id, self.user2_id, self.user3_id])
-        # Game A should be penalized and ranked lower
-        if self.game1 in suggestions and self.game2 in suggestions:
-            self.assertGreater(suggestions.index(self.game1), suggestions.index(self.game2))
-
-
-if __name__ == '__main__':
-    unittest.main()
+from data import db_manager
+from data.models import Game, GameExclusion, GameNight, UserGame
+from tests.conftest import bulk_add_users, raw_insert_many
+
+GAME_ROWS = [
+    {"title": "Game A", "min_players": 2, "max_players": 4, "tags": "strategy,coop",
+     "release_date": "2023-01-01", "description": "Desc A"},
+    {"title": "Game B", "min_players": 3, "max_players": 5, "tags": "action,rpg",
+     "release_date": "2023-01-01", "description": "Desc B"},
+    {"title": "Game C", "min_players": 2, "max_players": 2, "tags": "puzzle",
+     "release_date": "2023-01-01", "description": "Desc C"},
+    {"title": "Game D", "min_players": 4, "max_players": 6, "tags": "strategy",
+     "release_date": "2023-01-01", "description": "Desc D"},
+]
+
+# (user index, game index) pairs: everyone owns A and B, only user 1 owns C, users 2 and 3 own D
+OWNERSHIPS = [(0, 0), (1, 0), (2, 0), (0, 1), (1, 1), (2, 1), (0, 2), (1, 3), (2, 3)]
+
+
+@pytest.fixture(scope="module")
+def seeded(test_database):
+    """Add the users, games and ownerships shared by every test in this module, and return the user IDs and games.
+
+    The data is rolled back once the module is done; each test's own changes are rolled back before that by the
+    clean_database fixture.
+    """
+    with test_database.atomic() as transaction:
+        user_ids = tuple(bulk_add_users([("1", "User1"), ("2", "User2"), ("3", "User3")]))
+        # Rows from one INSERT get ascending IDs, so sorting restores the order of GAME_ROWS
+        game_ids = sorted(row.igdb_id for row in Game.insert_many(GAME_ROWS).returning(Game.igdb_id).execute())
+        games = tuple(Game.select().where(Game.igdb_id.in_(game_ids)).order_by(Game.igdb_id))
+        raw_insert_many(UserGame, ["user", "game", "source"], [
+            (user_ids[user], game_ids[game], "PC") for user, game in OWNERSHIPS
+        ])
+        yield user_ids, games
+        transaction.rollback()
+
+
+def play_a_recently(games):
+    """Mark Game A as played recently and Game B as played long ago."""
+    Game.update(last_played=(datetime.now() - timedelta(days=1))).where(Game.igdb_id == games[0].igdb_id).execute()
+    Game.update(last_played=(datetime.now() - timedelta(days=10))).where(Game.igdb_id == games[1].igdb_id).execute()
+
+
+def like_b_dislike_a(games):
+    """Have User1 like Game B and dislike Game A."""
+    user_id = db_manager.get_user_by_discord_id("1").id
+    UserGame.update(liked=True).where((UserGame.user == user_id) & (UserGame.game == games[1].igdb_id)).execute()
+    UserGame.update(disliked=True).where((UserGame.user == user_id) & (UserGame.game == games[0].igdb_id)).execute()
+
+
+def test_suggest_games_no_users(seeded):
+    """Test that no suggestions are returned when the user list is empty."""
+    suggestions = game_suggester.suggest_games([])
+    assert suggestions == []
+
+
+def test_suggest_games_all_users_common_game(seeded):
+    """Test suggesting games when all users have a common game."""
+    user_ids, games = seeded
+    suggestions = game_suggester.suggest_games(list(user_ids))
+    assert games[0] in suggestions
+    assert len(suggestions) == 2
+
+
+def test_suggest_games_group_size_match(seeded):
+    """Test that suggestions are filtered by group size."""
+    user_ids, games = seeded
+    suggestions = game_suggester.suggest_games(list(user_ids[:2]), group_size=3)
+    assert games[0] in suggestions  # Min 2, Max 4
+    assert games[1] in suggestions  # Min 3, Max 5
+
+
+@pytest.mark.parametrize(("prepare", "user_count", "options", "higher", "lower"), [
+    # Game B should be suggested before Game A due to its older last_played date
+    pytest.param(play_a_recently, 2, {}, 1, 0, id="last_played_scoring"),
+    # Game A has 'strategy'; Game B is still suggested but should be lower ranked
+    pytest.param(None, 3, {"preferred_tags": ["strategy"]}, 0, 1, id="preferred_tags"),
+    # Game B should be ranked higher than Game A due to like/dislike
+    pytest.param(like_b_dislike_a, 2, {}, 1, 0, id="liked_disliked_scoring"),
+])
+def test_suggest_games_ranking(seeded, prepare, user_count, options, higher, lower):
+    """Test that last played dates, preferred tags and likes/dislikes order the suggestions."""
+    user_ids, games = seeded
+    if prepare:
+        prepare(games)
+
+    suggestions = game_suggester.suggest_games(list(user_ids[:user_count]), **options)
+    assert games[higher] in suggestions
+    assert games[lower] in suggestions
+    assert suggestions.index(games[higher]) < suggestions.index(games[lower])
+
+
+def test_suggest_games_recently_won_penalty(seeded):
+    """Test that recently won games are penalized."""
+    user_ids, games = seeded
+    # Create a recent game night where Game A was selected
+    recent_time = datetime.now() - timedelta(days=5)
+    game_night_id = db_manager.add_game_night_event(user_ids[0], recent_time, "channel_id")
+    db_manager.update_game_night_selected_game(game_night_id, games[0].igdb_id)
+
+    suggestions = game_suggester.suggest_games(list(user_ids))
+    # Game A should be penalized and ranked lower
+    assert games[0] in suggestions
+    assert games[1] in suggestions
+    assert suggestions.index(games[0]) > suggestions.index(games[1])
+
+
+def reference_ranking(games, user_ids, group_size, preferred_tags):
+    """Rank games the way suggest_games did before its queries were batched, one lookup per game and user."""
+    now = datetime.now()
+    excluded = [game for game in games
+                if any(GameExclusion.get_or_none(user=user_id, game=game.igdb_id) for user_id in user_ids)]
+    scored_games = []
+    for game in games:
+        if game in excluded:
+            continue
+        score = 0
+        if group_size is not None:
+            if game.min_players is not None and game.max_players is not None:
+                if game.min_players <= group_size <= game.max_players:
+                    score += 10
+                elif game.min_players <= group_size + 2 and game.max_players >= group_size - 2:
+                    score += 5
+            elif game.min_players is not None and group_size >= game.min_players:
+                score += 3
+            elif game.max_players is not None and group_size <= game.max_players:
+                score += 3
+        if game.last_played:
+            time_diff = now - game.last_played
+            if time_diff.days < 1:
+                score -= 10
+            elif time_diff.days < 7:
+                score -= 5
+            score += min(time_diff.days // 30, 10)
+        if preferred_tags and game.tags:
+            score += 50 * sum(1 for tag in preferred_tags if tag in game.tags.split(','))
+        for user_id in user_ids:
+            user_game_entry = UserGame.get_or_none(user=user_id, game=game.igdb_id)
+            if user_game_entry:
+                if user_game_entry.liked:
+                    score += 20
+                elif user_game_entry.disliked:
+                    score -= 20
+                if user_game_entry.is_installed:
+                    score += 15
+        for game_night in GameNight.select().where(GameNight.scheduled_time > now - timedelta(days=30)):
+            if game_night.selected_game_id == game.igdb_id:
+                score -= 50
+        scored_games.append((game, score))
+    scored_games.sort(key=lambda x: x[1], reverse=True)
+    return [game for game, score in scored_games]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_suggest_games_matches_reference_ranking(seed):
+    """Test that the batched scoring in suggest_games ranks randomised games like the per-game lookups did."""
+    rng = random.Random(seed)
+    now = datetime.now()
+    tags = ["strategy", "coop", "action", "rpg", "puzzle"]
+    user_ids = bulk_add_users([(str(i), f"User{i}") for i in range(1, 4)])
+
+    def player_count():
+        return rng.choice([None, 1, 2, 3, 4, 6])
+
+    def last_played():
+        # Half a day off the whole-day boundaries, so the two rankings cannot see different day counts
+        return rng.choice([None, now - timedelta(days=rng.randrange(400), hours=12)])
+
+    Game.insert_many([{
+        "title": f"Game {i}",
+        "min_players": player_count(),
+        "max_players": player_count(),
+        "tags": ",".join(rng.sample(tags, rng.randrange(len(tags)))) or None,
+        "last_played": last_played(),
+    } for i in range(30)]).execute()
+    games = list(Game.select().order_by(Game.igdb_id))
+    UserGame.insert_many([{
+        "user": user_id, "game": game.igdb_id, "source": "steam", "liked": rng.random() < 0.3,
+        "disliked": rng.random() < 0.3, "is_installed": rng.random() < 0.5,
+    } for user_id in user_ids for game in games if rng.random() < 0.7]).execute()
+    GameExclusion.insert_many([{"user": rng.choice(user_ids), "game": game.igdb_id}
+                               for game in rng.sample(games, 3)]).on_conflict_ignore().execute()
+    for game in rng.sample(games, 4):
+        game_night_id = db_manager.add_game_night_event(
+            user_ids[0], now - timedelta(days=rng.randrange(60), hours=12), "1")
+        db_manager.update_game_night_selected_game(game_night_id, game.igdb_id)
+    group_size = rng.choice([None, 2, 4])
+    preferred_tags = rng.choice([None, rng.sample(tags, 2)])
+
+    suggestions = game_suggester.suggest_games(user_ids, group_size=group_size, preferred_tags=preferred_tags)
+
+    common_games = db_manager.get_games_owned_by_users(user_ids)
+    assert suggestions == reference_ranking(common_games, user_ids, group_size, preferred_tags)
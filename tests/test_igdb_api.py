@@ -0,0 +1,72 @@
+import json
+import os
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from steam.igdb_api import IGDBAPI
+
+
+@pytest.fixture
+def igdb_cache(tmp_path):
+    """Point the IGDB token and response caches at a temporary directory and return the token file."""
+    token_file = tmp_path / "igdb_token.json"
+    with patch('steam.igdb_api.IGDB_TOKEN_CACHE_FILE', str(token_file)), \
+            patch('steam.igdb_api.IGDB_RESPONSE_CACHE_DIR', str(tmp_path / "igdb_responses")):
+        yield token_file
+
+
+async def test_make_request_replaces_revoked_token(igdb_cache):
+    """Test that a 401 discards the cached token, fetches a new one and retries the request once."""
+    api = IGDBAPI()
+    igdb_cache.write_text(json.dumps(
+        {"client_id": api.client_id, "access_token": "revoked", "expires_at": time.time() + 3600}))
+
+    def handler(request):
+        if request.url.host == "id.twitch.tv":
+            return httpx.Response(200, json={"access_token": "fresh", "expires_in": 3600})
+        if request.headers["Authorization"] == "Bearer revoked":
+            return httpx.Response(401, json={"message": "Authorization Failure"})
+        return httpx.Response(200, json=[{"id": 1942}])
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    with patch('steam.igdb_api.get_client', return_value=client):
+        assert await api._make_request("games", "fields id; where id = 1942;") == [{"id": 1942}]
+
+    assert api.access_token == "fresh"
+    assert json.loads(igdb_cache.read_text())["access_token"] == "fresh"
+
+
+@pytest.fixture
+def igdb_games():
+    """Serve a fixed /games response to the IGDB client, with a token already in place."""
+    api = IGDBAPI()
+    api._set_access_token("token", time.time() + 3600)
+    client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, json=[{"id": 1942}])))
+    with patch('steam.igdb_api.get_client', return_value=client):
+        yield api
+
+
+async def test_search_responses_are_not_cached(igdb_cache, igdb_games):
+    """Test that free-text searches skip the response cache while ID lookups use it."""
+    await igdb_games.search_games("Game A")
+    assert not (igdb_cache.parent / "igdb_responses").exists()
+
+    await igdb_games.get_game_by_igdb_id(1942)
+    assert len(list((igdb_cache.parent / "igdb_responses").iterdir())) == 1
+
+
+async def test_expired_responses_are_pruned(igdb_cache, igdb_games):
+    """Test that writing a new response sweeps the cache entries that have outlived the TTL."""
+    cache_dir = igdb_cache.parent / "igdb_responses"
+    cache_dir.mkdir()
+    expired = cache_dir / "expired.json"
+    expired.write_text("[]")
+    os.utime(expired, (0, 0))
+
+    await igdb_games.get_game_by_igdb_id(1942)
+
+    assert not expired.exists()
+    assert len(list(cache_dir.iterdir())) == 1
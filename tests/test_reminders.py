@@ -13,12 +13,11 @@ from bot import reminders
 # Local application imports
 from bot.cogs.game_night_commands import GameNightCommands
 from data import db_manager
-from data.models import Game, GameNight, GameNightAttendee, User, db
 
 
-@pytest_asyncio.fixture
+@pytest_asyncio.fixture(scope="module")
 async def mock_bot():
-    """Mock the Discord bot for testing."""
+    """Mock the Discord bot for testing, built once with its cog for the whole module."""
     intents = discord.Intents.default()
     intents.members = True
     intents.message_content = True
@@ -30,6 +29,12 @@ async def mock_bot():
     return bot
 
 
+@pytest.fixture(autouse=True)
+def reset_scheduler(mock_bot):
+    """Clear the scheduler calls recorded by earlier tests on the shared bot."""
+    mock_bot.scheduler.reset_mock()
+
+
 @pytest.fixture
 def mock_interaction():
     """Mock a Discord interaction for testing."""
@@ -45,19 +50,6 @@ def mock_interaction():
     return interaction
 
 
-@pytest.fixture(autouse=True)
-def setup_test_db():
-    """Set up and tear down a temporary test database."""
-    # Using an in-memory SQLite database for tests is fast and clean
-    db.init(':memory:')
-    db.connect()
-    db.create_tables([User, Game, GameNight, GameNightAttendee])
-    yield
-    db.drop_tables([User, Game, GameNight, GameNightAttendee])
-    db.close()
-
-
-@pytest.mark.asyncio
 @patch('bot.cogs.game_night_commands.poll_manager.create_availability_poll')
 @patch('bot.cogs.game_night_commands.events.update_game_night_poll_message_id')
 @patch('bot.cogs.game_night_commands.events.add_game_night_event', return_value=1)
@@ -79,8 +71,7 @@ async def test_next_game_night_command(
     mock_bot.scheduler.add_job.assert_called_once()
     mock_interaction.followup.send.assert_called_once()
 
-@pytest.mark.asyncio
-@patch('bot.reminders.get_game_image', return_value="http://example.com/cover.jpg")
+@patch('bot.reminders.get_game_image', new_callable=AsyncMock, return_value="http://example.com/cover.jpg")
 @patch('data.db_manager.get_game_by_name')
 @patch('discord.ext.commands.Bot.fetch_user')
 async def test_send_game_night_reminder(mock_fetch_user, mock_get_game_by_name, mock_get_game_image, mock_bot):
@@ -88,7 +79,7 @@ async def test_send_game_night_reminder(mock_fetch_user, mock_get_game_by_name,
     mock_fetch_user.return_value = mock_user
     mock_user.send = AsyncMock()
 
-    mock_game = AsyncMock(steam_appid="12345")
+    mock_game = AsyncMock(igdb_id=1942, steam_appid="12345")
     mock_get_game_by_name.return_value = mock_game
 
     game_name = "Test Game"
@@ -100,19 +91,19 @@ async def test_send_game_night_reminder(mock_fetch_user, mock_get_game_by_name,
 
     mock_fetch_user.assert_called_once_with(int(user_discord_id))
     mock_get_game_by_name.assert_called_once_with(game_name)
+    mock_get_game_image.assert_awaited_once_with(1942, image_type="hero")
     mock_user.send.assert_called_once()
     args, kwargs = mock_user.send.call_args
     assert isinstance(kwargs['embed'], discord.Embed)
     assert "Launch Test Game on Steam" in kwargs['view'].children[0].label
 
 
-@pytest.mark.asyncio
 @patch('bot.cogs.game_night_commands.events.set_attendee_status')
 async def test_set_game_night_availability_command(
     mock_set_status, mock_bot, mock_interaction
 ):
     """Test the /set_game_night_availability command."""
-    user_id = db_manager.add_user(str(mock_interaction.user.id), mock_interaction.user.display_name)
+    user_id = db_manager.add_user("12345", mock_interaction.user.display_name)
     game_night_id = 100
 
     cog = mock_bot.get_cog("GameNightCommands")
@@ -127,7 +118,6 @@ async def test_set_game_night_availability_command(
     )
 
 
-@pytest.mark.asyncio
 @patch('bot.cogs.game_night_commands.GameNightCommands._handle_game_suggestion_and_poll', new_callable=AsyncMock)
 @patch('bot.cogs.game_night_commands.events.get_game_night_details')
 @patch('discord.ext.commands.Bot.get_channel')
@@ -135,7 +125,7 @@ async def test_finalize_game_night_command(
     mock_get_channel, mock_get_details, mock_handle_poll, mock_bot, mock_interaction
 ):
     """Test the /finalize_game_night command."""
-    organizer_id = db_manager.add_user(str(mock_interaction.user.id), mock_interaction.user.display_name)
+    organizer_id = db_manager.add_user("12345", mock_interaction.user.display_name)
     game_night_id = 101
 
     mock_get_details.return_value = MagicMock(
@@ -0,0 +1,36 @@
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from data import db_manager
+from data.models import Game
+from steam import steamgriddb_api
+
+
+@pytest.fixture
+def sgdb_requests():
+    """Serve canned SteamGridDB responses to get_game_image and return the paths it requested."""
+    paths = []
+
+    def handler(request):
+        paths.append(request.url.path)
+        if request.url.path.startswith("/api/v2/games/id/"):
+            return httpx.Response(200, json={"success": True, "data": {"id": 5050}})
+        return httpx.Response(200, json={"success": True, "data": [{"url": "http://example.com/grid.png"}]})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    with patch('steam.steamgriddb_api.get_client', return_value=client), \
+            patch('steam.steamgriddb_api.STEAMGRIDDB_API_KEY', "key"):
+        yield paths
+
+
+async def test_get_game_image_caches_sgdb_id(sgdb_requests):
+    """Test that the SteamGridDB ID is looked up once and then served from the game row."""
+    Game.insert(igdb_id=1942, title="Game A").execute()
+
+    assert await steamgriddb_api.get_game_image(1942) == "http://example.com/grid.png"
+    assert await steamgriddb_api.get_game_image(1942) == "http://example.com/grid.png"
+
+    assert db_manager.get_game_sgdb_id(1942) == 5050
+    assert sgdb_requests == ["/api/v2/games/id/1942", "/api/v2/grid/game/5050", "/api/v2/grid/game/5050"]
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+from data import db_manager
+from data.models import Game, UserGame
+from steam import update_game_data
+
+
+def fetched_titles(mock_fetch):
+    """Return the titles of every game passed to the mocked fetch_game_chunk."""
+    return {game.title for call in mock_fetch.call_args_list for game in call.args[0]}
+
+
+@patch('steam.update_game_data.write_game_chunk', return_value=(0, 0))
+@patch('steam.update_game_data.fetch_game_chunk', new_callable=AsyncMock, return_value=([], {}))
+async def test_update_skips_recently_refreshed_games(mock_fetch, mock_write):
+    """Test that only new and stale games are refetched, even when a fresh game has no cover."""
+    now = datetime.now()
+    Game.insert_many([
+        {"igdb_id": 1, "title": "New Game", "updated_at": None},
+        {"igdb_id": 2, "title": "Stale Game", "updated_at": now - timedelta(days=30), "cover_url": "cover.jpg"},
+        {"igdb_id": 3, "title": "Fresh Game", "updated_at": now, "cover_url": "cover.jpg"},
+        {"igdb_id": 4, "title": "Fresh Game Without Cover", "updated_at": now, "cover_url": None},
+    ]).execute()
+
+    await update_game_data.update_all_game_details_and_deduplicate()
+
+    assert fetched_titles(mock_fetch) == {"New Game", "Stale Game"}
+
+
+async def fetch_with_one_failing_chunk(games, semaphore):
+    """Resolve game 100 to the canonical game 200, and fail the chunk holding game 300."""
+    if games[0].igdb_id == 300:
+        raise RuntimeError("IGDB is down")
+    return [200], {200: {"name": "Canonical Game"}}
+
+
+@patch('steam.update_game_data.CHUNK_SIZE', 1)
+@patch('steam.update_game_data.fetch_game_chunk', side_effect=fetch_with_one_failing_chunk)
+async def test_update_merges_duplicates_when_a_chunk_fails(mock_fetch):
+    """Test that a chunk that fails to fetch is skipped and the duplicates from the others are still merged."""
+    user_id = db_manager.add_user("1", "user1")
+    Game.insert_many([
+        {"igdb_id": 100, "title": "Duplicate Game", "updated_at": None},
+        {"igdb_id": 200, "title": "Canonical Game", "updated_at": datetime.now()},
+        {"igdb_id": 300, "title": "Unlucky Game", "updated_at": None},
+    ]).execute()
+    UserGame.insert(user=user_id, game=100, source="steam").execute()
+
+    await update_game_data.update_all_game_details_and_deduplicate()
+
+    assert mock_fetch.call_count == 2
+    assert set(Game.select(Game.igdb_id).scalars()) == {200, 300}
+    assert [ownership.game_id for ownership in UserGame.select()] == [200]
+
+
+@patch('steam.update_game_data.flush_game_detail_updates', side_effect=RuntimeError("disk full"))
+@patch('steam.update_game_data.fetch_game_chunk', new_callable=AsyncMock,
+       return_value=([200], {200: {"name": "Canonical Game"}}))
+async def test_update_does_not_merge_into_unwritten_games(mock_fetch, mock_flush):
+    """Test that duplicates from a chunk that fails to write are not merged into games that were never created."""
+    Game.insert(igdb_id=100, title="Renamed Game").execute()
+
+    await update_game_data.update_all_game_details_and_deduplicate()
+
+    assert list(Game.select(Game.igdb_id).scalars()) == [100]
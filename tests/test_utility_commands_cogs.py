@@ -8,13 +8,12 @@ from discord.ext import commands
 
 from bot.cogs.utility_commands import UtilityCommands
 from data import db_manager
-from data.database import initialize_database
-from data.models import User, UserAvailability, VoiceActivity, db
+from data.models import UserAvailability
 
 
-@pytest_asyncio.fixture
+@pytest_asyncio.fixture(scope="module")
 async def mock_bot():
-    """Mock the Discord bot for testing."""
+    """Mock the Discord bot for testing, built once with its cog for the whole module."""
     intents = discord.Intents.default()
     intents.members = True
     intents.message_content = True
@@ -36,24 +35,14 @@ def mock_interaction():
     interaction.user = MagicMock(id=12345, display_name="TestUser")
     return interaction
 
-@pytest.fixture(autouse=True)
-def setup_test_db():
-    """Set up and tear down a temporary test database."""
-    initialize_database()
-    yield
-    db.drop_tables([User, UserAvailability, VoiceActivity])
-    db.close()
-
 # --- Tests for UtilityCommands Cog ---
 
-@pytest.mark.asyncio
 async def test_ping_command(mock_bot, mock_interaction):
     """Test the /ping command."""
     cog = mock_bot.get_cog("UtilityCommands")
     await cog.ping.callback(cog, mock_interaction)
     mock_interaction.response.send_message.assert_called_once_with("Pong!")
 
-@pytest.mark.asyncio
 @patch('bot.cogs.utility_commands.fetch_and_store_games', new_callable=AsyncMock)
 @patch('steam.steam_api.get_owned_games')
 async def test_set_steam_id_command_valid(mock_get_owned_games, mock_fetch_and_store_games, mock_bot, mock_interaction):
@@ -73,7 +62,6 @@ async def test_set_steam_id_command_valid(mock_get_owned_games, mock_fetch_and_s
         "Your Steam library has been successfully synced!", ephemeral=True
     )
 
-@pytest.mark.asyncio
 async def test_set_steam_id_command_invalid(mock_bot, mock_interaction):
     """Test the /set_steam_id command with an invalid Steam ID."""
     cog = mock_bot.get_cog("UtilityCommands")
@@ -91,10 +79,9 @@ async def test_set_steam_id_command_invalid(mock_bot, mock_interaction):
         ephemeral=True
     )
 
-@pytest.mark.asyncio
 async def test_set_weekly_availability_command(mock_bot, mock_interaction):
     """Test the /set_weekly_availability command."""
-    user_id = db_manager.add_user(str(mock_interaction.user.id), mock_interaction.user.display_name)
+    user_id = db_manager.add_user("12345", mock_interaction.user.display_name)
 
     cog = mock_bot.get_cog("UtilityCommands")
     availability_input = "Monday,Wednesday"
@@ -106,10 +93,9 @@ async def test_set_weekly_availability_command(mock_bot, mock_interaction):
     user_availability = UserAvailability.get(user=user_id)
     assert user_availability.available_days == "0,2"
 
-@pytest.mark.asyncio
 async def test_set_weekly_availability_command_clear(mock_bot, mock_interaction):
     """Test clearing weekly availability."""
-    user_id = db_manager.add_user(str(mock_interaction.user.id), mock_interaction.user.display_name)
+    user_id = db_manager.add_user("12345", mock_interaction.user.display_name)
     # Set some initial availability
     UserAvailability.create(user=user_id, available_days="0,1")
 
@@ -123,10 +109,9 @@ async def test_set_weekly_availability_command_clear(mock_bot, mock_interaction)
     user_availability = UserAvailability.get(user=user_id)
     assert user_availability.available_days == ""
 
-@pytest.mark.asyncio
 async def test_set_game_pass_command(mock_bot, mock_interaction):
     """Test the /set_game_pass command."""
-    db_manager.add_user(str(mock_interaction.user.id), mock_interaction.user.display_name)
+    db_manager.add_user("12345", mock_interaction.user.display_name)
 
     cog = mock_bot.get_cog("UtilityCommands")
     await cog.set_game_pass.callback(cog, mock_interaction, has_game_pass=True)
@@ -135,13 +120,12 @@ async def test_set_game_pass_command(mock_bot, mock_interaction):
     mock_interaction.followup.send.assert_called_once_with(
         "Your Game Pass status has been set to **enabled**.", ephemeral=True
     )
-    user = db_manager.get_user_by_discord_id(str(mock_interaction.user.id))
+    user = db_manager.get_user_by_discord_id("12345")
     assert user.has_game_pass is True
 
-@pytest.mark.asyncio
 async def test_set_reminder_offset_command(mock_bot, mock_interaction):
     """Test the /set_reminder_offset command with a valid choice."""
-    db_manager.add_user(str(mock_interaction.user.id), mock_interaction.user.display_name)
+    db_manager.add_user("12345", mock_interaction.user.display_name)
 
     cog = mock_bot.get_cog("UtilityCommands")
 
@@ -156,14 +140,13 @@ async def test_set_reminder_offset_command(mock_bot, mock_interaction):
     mock_interaction.followup.send.assert_called_once_with(
         f"Your default reminder offset has been set to **{mock_choice.name}**.", ephemeral=True
     )
-    user = db_manager.get_user_by_discord_id(str(mock_interaction.user.id))
+    user = db_manager.get_user_by_discord_id("12345")
     assert user.default_reminder_offset_minutes == mock_choice.value
 
-@pytest.mark.asyncio
 @patch('data.db_manager.get_user_game_night_history')
 async def test_game_night_history_command_with_history(mock_get_history, mock_bot, mock_interaction):
     """Test the /game_night_history command when a user has history."""
-    user_id = str(mock_interaction.user.id)
+    user_id = "12345"
     db_manager.add_user(user_id, mock_interaction.user.display_name)
 
     # Mock game night objects
@@ -190,11 +173,10 @@ async def test_game_night_history_command_with_history(mock_get_history, mock_bo
     assert "**2024-07-11 08:00 PM**: Game B" in sent_embed.description
     assert "**2024-07-10 07:00 PM**: Game A" in sent_embed.description
 
-@pytest.mark.asyncio
 @patch('data.db_manager.get_user_game_night_history')
 async def test_game_night_history_command_no_history(mock_get_history, mock_bot, mock_interaction):
     """Test the /game_night_history command when a user has no history."""
-    user_id = str(mock_interaction.user.id)
+    user_id = "12345"
     db_manager.add_user(user_id, mock_interaction.user.display_name)
     mock_get_history.return_value = []
 
@@ -208,12 +190,11 @@ async def test_game_night_history_command_no_history(mock_get_history, mock_bot,
     assert sent_embed.title == f"{mock_interaction.user.display_name}'s Game Night History"
     assert sent_embed.description == "No game nights attended yet."
 
-@pytest.mark.asyncio
 @patch('data.db_manager.get_attended_game_nights_count')
 @patch('data.models.VoiceActivity.select')
 async def test_discord_wrapped_command_with_game_nights(mock_voice_activity_select, mock_get_attended_count, mock_bot, mock_interaction):
     """Test the /discord_wrapped command including game nights attended."""
-    user_id = str(mock_interaction.user.id)
+    user_id = "12345"
     db_manager.add_user(user_id, mock_interaction.user.display_name)
 
     # Mock VoiceActivity data
@@ -1,24 +1,8 @@
-import os
-import sys
 from datetime import datetime, timedelta
 
 import pytest
 
-# Add the project root to the Python path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
-from data.models import User, VoiceActivity, db
-
-
-# Initialize the database for testing
-@pytest.fixture(scope="module", autouse=True)
-def setup_test_database():
-    """Set up and tear down an in-memory database for the test module."""
-    db.init(':memory:')  # Use in-memory database for testing
-    db.connect()
-    db.create_tables([User, VoiceActivity])
-    yield
-    db.close()
+from data.models import User, VoiceActivity
 
 
 @pytest.fixture
@@ -49,8 +33,8 @@ def test_voice_activity_logging(create_test_user):
     activity = VoiceActivity.get(user=user, guild_id=guild_id, channel_id=channel_id, join_time=join_time)
     assert activity is not None
     assert activity.user == user
-    assert activity.guild_id == guild_id
-    assert activity.channel_id == channel_id
+    assert activity.guild_id == int(guild_id)
+    assert activity.channel_id == int(channel_id)
     assert activity.join_time == join_time
     assert activity.leave_time is None
 
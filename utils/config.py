@@ -19,5 +19,12 @@ XBOX_REDIRECT_URI = os.getenv("XBOX_REDIRECT_URI", "")
 # -------------------------
 
 DATABASE_FILE = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "users.db"))
+IGDB_TOKEN_CACHE_FILE = os.getenv(
+    "IGDB_TOKEN_CACHE_FILE", os.path.join(os.path.expanduser("~"), ".cache", "gamenight", "igdb_token.json")
+)
+IGDB_RESPONSE_CACHE_DIR = os.getenv(
+    "IGDB_RESPONSE_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "gamenight", "igdb_responses")
+)
+IGDB_RESPONSE_CACHE_TTL = int(os.getenv("IGDB_RESPONSE_CACHE_TTL", str(24 * 60 * 60)))
 DEBUG = os.getenv("DEBUG", "False").lower() == "true"
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
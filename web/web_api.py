@@ -38,7 +38,8 @@ def show_library(discord_id):
 def get_all_users_api():
     """Provide a list of all registered users."""
     users = db_manager.get_all_users()
-    user_list = [{"discord_id": u.discord_id, "username": u.username} for u in users]
+    # Snowflakes exceed JavaScript's safe integer range, so send them as strings.
+    user_list = [{"discord_id": str(u.discord_id), "username": u.username} for u in users]
     return jsonify(user_list)
 
 @app.route('/api/games')